@@ -0,0 +1,129 @@
+"""Generate synthetic schema trees and config files to benchmark against."""
+
+from typing import Any, Dict, List
+import json
+import os
+import posixpath
+
+BASE_URI = "https://configkit.invalid/bench/"
+LAYOUTS = ("version_name", "name_version")
+
+
+def schema_relpath(layout: str, name: str, version: str) -> str:
+    if layout == "version_name":
+        return posixpath.join(version, name + ".json")
+    if layout == "name_version":
+        return posixpath.join(name, version + ".json")
+    raise ValueError("Unknown layout: {!r}".format(layout))
+
+
+def schema_name(index: int) -> str:
+    return "schema{:04d}".format(index)
+
+
+def schema_version(index: int) -> str:
+    return "{}.{}".format(index // 10, index % 10)
+
+
+def make_schema(relpath: str, ref: str = None) -> Dict[str, Any]:
+    definition = {
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "$id": BASE_URI + relpath,
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "enabled": {"type": "boolean"},
+            "items": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "integer", "minimum": 0},
+                        "value": {"type": "string", "maxLength": 64},
+                        "tags": {"type": "array", "items": {"type": "string"}},
+                    },
+                    "required": ["id", "value"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["name", "items"],
+        "additionalProperties": False,
+    }
+    if ref is not None:
+        definition["properties"]["peer"] = {"$ref": ref}
+    return definition
+
+
+def generate_tree(
+    root: str, names: int, versions: int, layout: str = "version_name", refs=False
+) -> List[str]:
+    """
+    Write ``names`` x ``versions`` schemas under ``root``.
+
+    With ``refs``, every schema ``$ref``s the same version of the next
+    name, so the whole tree is one reference cycle per version.
+    """
+    written = []
+    for n in range(names):
+        for v in range(versions):
+            name, version = schema_name(n), schema_version(v)
+            relpath = schema_relpath(layout, name, version)
+            ref = None
+            if refs:
+                target = schema_relpath(layout, schema_name((n + 1) % names), version)
+                ref = posixpath.relpath(target, posixpath.dirname(relpath))
+            path = os.path.join(root, *relpath.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as fp:
+                json.dump(make_schema(relpath, ref), fp, indent=2)
+            written.append(path)
+    return written
+
+
+def make_config(size: int) -> Dict[str, Any]:
+    """Return a config instance whose JSON encoding is roughly ``size`` bytes."""
+    item = {"id": 0, "value": "x" * 32, "tags": ["alpha", "beta", "gamma"]}
+    count = max(1, size // len(json.dumps(item)))
+    return {
+        "name": "benchmark",
+        "enabled": True,
+        "items": [dict(item, id=i) for i in range(count)],
+    }
+
+
+def dump_toml(config: Dict[str, Any]) -> str:
+    lines = [
+        "name = {}".format(json.dumps(config["name"])),
+        "enabled = {}".format("true" if config["enabled"] else "false"),
+    ]
+    for item in config["items"]:
+        lines += [
+            "",
+            "[[items]]",
+            "id = {}".format(item["id"]),
+            "value = {}".format(json.dumps(item["value"])),
+            "tags = [{}]".format(", ".join(json.dumps(tag) for tag in item["tags"])),
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def write_config(path: str, size: int) -> str:
+    """Write a config of about ``size`` bytes in the format of ``path``'s extension."""
+    config = make_config(size)
+    fmt = os.path.splitext(path)[1][1:]
+
+    if fmt == "json":
+        text = json.dumps(config)
+    elif fmt == "yaml":
+        import yaml
+
+        text = yaml.safe_dump(config, default_flow_style=None)
+    elif fmt == "toml":
+        text = dump_toml(config)
+    else:
+        raise ValueError("Unknown format: {!r}".format(fmt))
+
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write(text)
+    return path
@@ -0,0 +1,274 @@
+"""
+Benchmark importing, scanning, lookup, ``$ref`` resolution and config loading.
+
+Run from the repository root::
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --save-baseline
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+
+The last form compares the run against the stored baseline and exits
+with status 1 if any benchmark got slower than ``--max-slowdown``.
+"""
+
+from . import generate
+from configkit import SchemaDirectory
+from configkit.cache import LoadCache
+from configkit.loaders import toml, yaml
+from configkit.matchers import name_version_matcher, version_name_matcher
+from configkit.validation import CompiledBackend
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MATCHERS = {
+    "version_name": version_name_matcher,
+    "name_version": name_version_matcher,
+}
+
+SIZES = {"1KB": 1 << 10, "100KB": 100 << 10, "1MB": 1 << 20, "100MB": 100 << 20}
+
+
+def measure(
+    fn: Callable[[], Any],
+    repeat: int,
+    setup: Optional[Callable[[], Any]] = None,
+    number: int = 1,
+) -> Dict[str, float]:
+    """Time ``repeat`` runs of ``number`` calls; ``setup`` runs untimed before each."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def bench_tree(
+    results: Dict[str, Dict[str, float]],
+    root: str,
+    layout: str,
+    refs: bool,
+    names: int,
+    versions: int,
+    repeat: int,
+):
+    tag = "{}{}".format(layout, "+refs" if refs else "")
+    path = os.path.join(root, tag)
+    generate.generate_tree(path, names, versions, layout, refs)
+    matcher = MATCHERS[layout]
+    name = generate.schema_name(names // 2)
+
+    results["scan[{}]".format(tag)] = measure(
+        lambda: len(SchemaDirectory(path, matcher)), repeat
+    )
+    results["scan_lazy[{}]".format(tag)] = measure(
+        lambda: len(SchemaDirectory(path, matcher, lazy=True)), repeat
+    )
+
+    bundle = os.path.join(root, tag + ".bundle")
+    SchemaDirectory(path, matcher).save_bundle(bundle)
+    results["from_bundle[{}]".format(tag)] = measure(
+        lambda: len(SchemaDirectory.from_bundle(bundle)), repeat
+    )
+
+    directory = SchemaDirectory(path, matcher)
+    len(directory)
+    results["refresh_unchanged[{}]".format(tag)] = measure(directory.refresh, repeat)
+    results["lookup[{}]".format(tag)] = measure(
+        lambda: directory[name], repeat, number=1000
+    )
+    results["newest[{}]".format(tag)] = measure(
+        lambda: directory[name].newest(), repeat, number=1000
+    )
+    spec = "~={}".format(generate.schema_version(versions // 2))
+    results["version[{}]".format(tag)] = measure(
+        lambda: directory[name].version(spec), repeat, number=1000
+    )
+
+    if refs:
+        sch = directory[name].newest()
+        ref = sch.definition["properties"]["peer"]["$ref"]
+        results["resolve[{}]".format(tag)] = measure(
+            lambda: directory.resolver(sch.id, sch.definition).resolve(ref),
+            repeat,
+            number=100,
+        )
+
+
+def bench_loads(
+    results: Dict[str, Dict[str, float]],
+    root: str,
+    sizes: List[str],
+    formats: List[str],
+    repeat: int,
+):
+    path = os.path.join(root, "load-schemas")
+    generate.generate_tree(path, 1, 1)
+    directory = SchemaDirectory(path, version_name_matcher)
+    sch = directory[generate.schema_name(0)].newest()
+
+    for size in sizes:
+        for fmt in formats:
+            config = generate.write_config(
+                os.path.join(root, "config-{}.{}".format(size, fmt)), SIZES[size]
+            )
+            runs = repeat if SIZES[size] < SIZES["1MB"] else max(1, repeat // 5)
+            results["load[{},{}]".format(fmt, size)] = measure(
+                lambda: sch.load(config), runs
+            )
+
+    config = generate.write_config(os.path.join(root, "repeat.json"), SIZES["1KB"])
+    results["repeated_load[json,1KB]"] = measure(
+        lambda: sch.load(config), repeat, number=200
+    )
+    cache = LoadCache()
+    results["repeated_load_cached[json,1KB]"] = measure(
+        lambda: sch.load(config, cache=cache), repeat, number=200
+    )
+    instance = generate.make_config(SIZES["1KB"])
+    results["validate[1KB]"] = measure(
+        lambda: sch.validate(instance), repeat, number=200
+    )
+    compiled = SchemaDirectory(path, version_name_matcher, backend=CompiledBackend())
+    compiled_sch = compiled[generate.schema_name(0)].newest()
+    results["validate_compiled[1KB]"] = measure(
+        lambda: compiled_sch.validate(instance), repeat, number=200
+    )
+
+
+def bench_import(results: Dict[str, Dict[str, float]], repeat: int):
+    # Each import needs a fresh interpreter; -X importtime leaves out its startup.
+    times = []
+    for _ in range(repeat):
+        report = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import configkit"],
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        ).stderr
+        times.extend(
+            int(line.split("|")[1]) / 1e6
+            for line in report.splitlines()
+            if line.rstrip().endswith("| configkit")
+        )
+    results["import"] = {
+        "median": statistics.median(times),
+        "min": min(times),
+        "repeat": repeat,
+        "number": 1,
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, float]] = {}
+    formats = ["json"]
+    formats += ["yaml"] if yaml is not None else []
+    formats += ["toml"] if toml is not None else []
+
+    bench_import(results, args.repeat)
+    with tempfile.TemporaryDirectory(prefix="configkit-bench-") as root:
+        for layout in generate.LAYOUTS:
+            for refs in (False, True):
+                bench_tree(
+                    results, root, layout, refs, args.names, args.versions, args.repeat
+                )
+        bench_loads(results, root, args.sizes, formats, args.repeat)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "names": args.names,
+            "versions": args.versions,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "benchmarks": results,
+    }
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], max_slowdown: float
+) -> List[str]:
+    """Print a comparison table and return the names of regressed benchmarks."""
+    regressions = []
+    print("{:<45} {:>12} {:>12} {:>8}".format("benchmark", "baseline", "current", "ratio"))
+    for name, result in sorted(current["benchmarks"].items()):
+        before = baseline["benchmarks"].get(name)
+        if before is None:
+            print("{:<45} {:>12} {:>12.6f} {:>8}".format(name, "-", result["median"], "new"))
+            continue
+        ratio = result["median"] / before["median"]
+        flag = " !" if ratio > max_slowdown else ""
+        print(
+            "{:<45} {:>12.6f} {:>12.6f} {:>7.2f}x{}".format(
+                name, before["median"], result["median"], ratio, flag
+            )
+        )
+        if ratio > max_slowdown:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--names", type=int, default=50)
+    parser.add_argument("--versions", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        choices=sorted(SIZES, key=SIZES.get),
+        default=["1KB", "100KB", "1MB"],
+    )
+    parser.add_argument("--output", "-o", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store this run as the baseline instead of comparing",
+    )
+    parser.add_argument("--max-slowdown", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    current = run(args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(current, fp, indent=2, sort_keys=True)
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as fp:
+            json.dump(current, fp, indent=2, sort_keys=True)
+    elif args.baseline:
+        with open(args.baseline, encoding="utf-8") as fp:
+            baseline = json.load(fp)
+        regressions = compare(current, baseline, args.max_slowdown)
+        if regressions:
+            print("Slower than baseline: {}".format(", ".join(regressions)))
+            return 1
+    elif not args.output:
+        json.dump(current, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,13 @@
 from .directory import Directory as SchemaDirectory
 from .versions import version_sort_key
-from jsonschema import ValidationError
 
 __all__ = ["SchemaDirectory", "version_sort_key", "ValidationError"]
+
+
+def __getattr__(name):
+    # jsonschema is only imported once something needs it.
+    if name == "ValidationError":
+        from jsonschema import ValidationError
+
+        return ValidationError
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,154 @@
+"""
+Pack a schema directory into a single file.
+
+A bundle holds everything a :class:`~configkit.directory.Directory`
+would otherwise find by walking its root: each schema's name, version,
+``$id`` and definition. It is laid out as a magic line, a header line
+of JSON with the index, and then each definition as compact JSON::
+
+    configkit-bundle 1
+    {"format": 1, "root": ..., "schemas": [[relpath, name, ...], ...]}
+    {...}{...}...
+
+Each entry of ``schemas`` is the schema's path relative to the root,
+its name, version, ``$id``, the sha256 of its definition and where the
+definition is.
+
+Offsets are from the end of the header line, so a definition can be
+parsed straight out of the file's contents without reading any of the
+others. Schemas are checked against the meta-schema when the bundle is
+written, and not again when it is loaded.
+"""
+
+from . import directory as directories
+from . import matchers, schema, versions
+from typing import Any, Dict, List, Tuple
+import hashlib
+import json
+import mmap
+import os
+
+FORMAT = 1
+
+MAGIC = "configkit-bundle {}\n".format(FORMAT).encode("ascii")
+
+
+def dump(dir_: "directories.Directory") -> Tuple[dict, List[bytes]]:
+    """Return the header and the definitions of a bundle for a scanned directory."""
+    from jsonschema import SchemaError
+
+    root = os.path.abspath(dir_.path)
+    entries, blobs, offset = [], [], 0
+
+    found = [sch for vers in dir_.values() for sch in vers]
+    for sch in sorted(found, key=lambda sch: sch.path):
+        try:
+            definition = sch.definition
+        except (SchemaError, ValueError, OSError):
+            continue
+        blob = json.dumps(definition, separators=(",", ":")).encode("utf-8")
+        entries.append(
+            [
+                os.path.relpath(sch.path, root),
+                sch.name,
+                sch.version,
+                sch.id,
+                hashlib.sha256(blob).hexdigest(),
+                offset,
+                len(blob),
+            ]
+        )
+        blobs.append(blob)
+        offset += len(blob)
+
+    return {"format": FORMAT, "root": root, "schemas": entries}, blobs
+
+
+def write(dir_: "directories.Directory", path: str):
+    """Atomically write a bundle of a scanned directory to ``path``."""
+    header, blobs = dump(dir_)
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "wb") as fp:
+        fp.write(MAGIC)
+        fp.write(json.dumps(header, separators=(",", ":")).encode("utf-8"))
+        fp.write(b"\n")
+        fp.writelines(blobs)
+    os.replace(tmp_path, path)
+
+
+def read(path: str, map_file: bool = False) -> Tuple[dict, Any, int]:
+    """
+    Read the bundle at ``path``.
+
+    Return its header, its contents (``bytes``, or an ``mmap`` if
+    ``map_file`` is true) and where the definitions start in them.
+    """
+    with open(path, "rb") as fp:
+        if map_file:
+            data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            data = fp.read()
+
+    end = data.find(b"\n", len(MAGIC))
+    if data[: len(MAGIC)] != MAGIC or end < 0:
+        raise ValueError("Not a configkit bundle: {!r}".format(path))
+    header = json.loads(data[len(MAGIC) : end].decode("utf-8"))
+    return header, data, end + 1
+
+
+class BundleDirectory(directories.Directory):
+    """
+    A :class:`~configkit.directory.Directory` loaded from a bundle.
+
+    Its index is fixed when it is loaded: :meth:`refresh` and
+    :meth:`invalidate` have nothing to do, since a bundle never changes.
+    Schema paths are those they had under the root the bundle was made
+    from, joined to the bundle's own path.
+    """
+
+    def __init__(self, path: str, mmap: bool = False, **kwargs):
+        super().__init__(path, **kwargs)
+        with self.instrument("read", path=path):
+            header, self._data, start = read(path, mmap)
+
+        self._blobs: Dict[str, Tuple[int, int, str]] = {}
+        by_name: Dict[str, List[schema.Schema]] = {}
+        for entry in header["schemas"]:
+            relpath, name, version, schema_id, digest, offset, length = entry
+            filepath = os.path.join(path, relpath)
+            self._blobs[filepath] = start + offset, length, digest
+            sch = schema.Schema(
+                None,
+                matchers.interned(matchers.SchemaInfo(name, version)),
+                self,
+                path=filepath,
+                digest=digest,
+                schema_id=schema_id,
+            )
+            by_name.setdefault(name, []).append(sch)
+
+        self.root = header["root"]
+        self._snapshot = directories.snapshot(
+            {name: versions.Versions(found) for name, found in by_name.items()}
+        )
+        self.generation = 1
+
+    def __repr__(self) -> str:
+        return "BundleDirectory(path={!r})".format(self.path)
+
+    def find(self):
+        for vers in self._cache.values():
+            yield from vers
+
+    def invalidate(self, path=None):
+        pass
+
+    def read_definition(self, path: str) -> Tuple[Any, str]:
+        offset, length, digest = self._blobs[path]
+        with self.instrument("parse", path=path):
+            blob = self._data[offset : offset + length]
+            definition = json.loads(blob.decode("utf-8"))
+        return definition, digest
+
+    def _scan(self):
+        pass
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import threading
+
+
+class LoadCache:
+    """
+    A thread-safe LRU cache for validated config instances.
+
+    Entries are evicted, least recently used first, once there are more
+    than ``maxsize`` of them or, if ``maxbytes`` is given, once the sizes
+    they were stored with add up to more than ``maxbytes``.
+
+    >>> cache = LoadCache(maxsize=2)
+    >>> cache.put("a", 1); cache.put("b", 2); cache.get("a")
+    1
+    >>> cache.put("c", 3); cache.get("b", "evicted")
+    'evicted'
+    """
+
+    def __init__(self, maxsize: Optional[int] = 128, maxbytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return "LoadCache(maxsize={!r}, maxbytes={!r})".format(
+            self.maxsize, self.maxbytes
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """The total size of the cached entries, in bytes."""
+        return self._bytes
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value, size = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, size: int = 0):
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+            while (self.maxsize is not None and len(self._entries) > self.maxsize) or (
+                self.maxbytes is not None and self._bytes > self.maxbytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -1,28 +1,208 @@
 from . import versions
 from . import schema
 from . import matchers
+from . import manifest as manifests
+from . import pool
+from . import cache as caching
+from . import layered
+from . import loaders as loading
+from . import observers
+from concurrent.futures import Executor
 from collections.abc import Mapping
 from contextlib import contextmanager
-from pathlib import Path
-from typing import Optional, Iterator
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Iterator,
+    Tuple,
+)
 import os
-import json
+import threading
+
+if TYPE_CHECKING:
+    from . import bundle as bundles
+    from . import validation
+    from . import watch as watching
+    from jsonschema import RefResolver
+
+
+FileSignature = NamedTuple(
+    "FileSignature", [("mtime_ns", int), ("size", int), ("inode", int)]
+)
+
+_DirEntry = NamedTuple(
+    "_DirEntry",
+    [
+        ("mtime_ns", int),
+        ("files", Tuple[Tuple[str, "matchers.SchemaInfo"], ...]),
+        ("subdirs", Tuple[str, ...]),
+    ],
+)
+
+_FileEntry = NamedTuple(
+    "_FileEntry",
+    [("signature", FileSignature), ("schema", Optional["schema.Schema"])],
+)
+
+
+# What lookups see: the index by name and by $id. It is never changed
+# once published, only replaced as a whole. ``unresolved`` are the lazy
+# schemas whose $id is not known yet (see Directory._resolve_lazy_id).
+_Snapshot = NamedTuple(
+    "_Snapshot",
+    [
+        ("names", Dict[str, "versions.Versions"]),
+        ("ids", Dict[str, "schema.Schema"]),
+        ("unresolved", Tuple["schema.Schema", ...]),
+    ],
+)
+
+
+_COUNTERS = (
+    "full_scans",
+    "scans",
+    "dirs_listed",
+    "files_parsed",
+    "schemas_checked",
+    "validators_built",
+    "validators_shared",
+    "definitions_shared",
+    "refs_resolved",
+    "validations",
+    "configs_read",
+    "load_cache_hits",
+    "load_cache_misses",
+)
+
+
+def signature(st: os.stat_result) -> FileSignature:
+    """Return the parts of a stat result that tell us a file changed."""
+    return FileSignature(st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def snapshot(names: Dict[str, "versions.Versions"]) -> _Snapshot:
+    """Index ``names`` by ``$id`` too, as far as that is known without reading."""
+    ids: Dict[str, schema.Schema] = {}
+    unresolved: List[schema.Schema] = []
+    for vers in names.values():
+        for sch in vers:
+            if sch._id is schema._unknown and sch._definition is None:
+                unresolved.append(sch)
+            else:
+                ids.setdefault(sch.id, sch)
+    return _Snapshot(names, ids, tuple(unresolved))
 
 
 class Directory(Mapping):
+    """
+    A mapping of schema names to their :class:`~configkit.versions.Versions`.
+
+    The tree under ``path`` is scanned the first time the directory is
+    used, and the index is kept until :meth:`refresh` picks up what
+    changed on disk; :attr:`generation` is bumped whenever it does. A
+    directory can be shared between threads.
+    """
+
     def __init__(
-        self, path: str, matcher: "matchers.IMatcher" = matchers.version_name_matcher
+        self,
+        path: str,
+        matcher: "matchers.IMatcher" = matchers.version_name_matcher,
+        manifest: Optional[str] = None,
+        lazy: bool = False,
+        workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        load_cache: Optional["caching.LoadCache"] = None,
+        loaders: "loading.LoaderRegistry" = loading.default_registry,
+        observer: Optional["observers.IObserver"] = None,
+        backend: Optional["validation.IValidatorBackend"] = None,
+        fail_fast: bool = False,
+        frozen: bool = False,
     ):
+        """
+        ``matcher`` decides which files under ``path`` are schemas, from
+        their paths relative to ``path``. The other options are:
+
+        - ``manifest``: a file written by :meth:`save_manifest` to seed the
+          index from, so that the tree is only stat'ed.
+        - ``lazy``: index files by name alone, and read and check each
+          schema the first time it is used, which raises
+          :class:`jsonschema.SchemaError` if it is invalid.
+        - ``workers`` or ``executor``: read schema files on a thread pool
+          of that size, or on any :class:`~concurrent.futures.Executor`.
+        - ``load_cache``: a :class:`~configkit.cache.LoadCache` of
+          validated configs.
+        - ``loaders``: the :class:`~configkit.loaders.LoaderRegistry` that
+          parses config files.
+        - ``observer``: an :class:`~configkit.observers.IObserver` that
+          times each stage.
+        - ``backend``: the :class:`~configkit.validation.IValidatorBackend`
+          that builds validators; ``jsonschema`` 's by default.
+        - ``fail_fast``: stop validating at the first failing keyword.
+        - ``frozen``: load configs as read-only
+          :class:`~configkit.frozen.FrozenDict` and
+          :class:`~configkit.frozen.FrozenList` instances.
+        """
         self.path = path
         self.matcher = matcher
-        self._cache = None
+        self.manifest = manifest
+        self.lazy = lazy
+        self.workers = workers
+        self.executor = executor
+        self.load_cache = load_cache
+        self.loaders = loaders
+        self.observer = observer
+        self._backend = backend
+        self.fail_fast = fail_fast
+        self.frozen = frozen
+        self.counters = observers.Counters()
+        self.generation = 0
+        self.parent: Optional[layered.LayeredDirectory] = None
+        self._snapshot: Optional[_Snapshot] = None
+        self._dirs: Dict[str, _DirEntry] = {}
+        self._files: Dict[str, _FileEntry] = {}
+        self._dirty = set()
+        # Held while scanning, which only one thread does at a time.
+        self._scan_lock = threading.RLock()
+        self._scans_started = self._scans_done = 0
+        self._dirty_lock = threading.Lock()
+        # Held while the snapshot is replaced.
+        self._snapshot_lock = threading.Lock()
+        self._remote: Dict[str, object] = {}
+        # Parsed definitions and validators, by the sha256 of their source.
+        self._definitions: Dict[str, object] = {}
+        self._validators: Dict[Tuple[str, object], Tuple[object, dict]] = {}
+        self._scan_future = None, None
+
+        if manifest is not None:
+            manifests.read(self, manifest)
+
+    @classmethod
+    def from_bundle(
+        cls, path: str, mmap: bool = False, **kwargs
+    ) -> "bundles.BundleDirectory":
+        """
+        Load a directory from a bundle written by :meth:`save_bundle`.
+
+        The bundle is read in one go, or memory-mapped if ``mmap`` is
+        true, and nothing else is read from disk: schemas are parsed from
+        it the first time they are used, and are not checked against the
+        meta-schema again. ``kwargs`` are as for :class:`Directory`.
+        """
+        from . import bundle as bundles
+
+        return bundles.BundleDirectory(path, mmap=mmap, **kwargs)
 
     def __repr__(self) -> str:
         return "Directory(path={!r})".format(self.path)
 
     def __len__(self) -> int:
-        with self.scan_if_needed():
-            return len(self._cache)
+        with self.scan_if_needed() as cache:
+            return len(cache)
 
     def __iter__(self) -> Iterator[str]:
         with self.scan_if_needed() as cache:
@@ -30,35 +210,226 @@ class Directory(Mapping):
 
     def __getitem__(self, key: str) -> "versions.Versions":
         with self.scan_if_needed() as cache:
-            version_list = cache[key]
-            return versions.Versions(version_list)
+            return cache[key]
 
-    def values(self) -> Iterator["versions.Versions"]:
-        with self.ensure_cache():
-            yield from super().values()
+    def find(self) -> Iterator["schema.Schema"]:
+        """Walk the whole directory path, rebuild the index and yield valid schemas."""
+        with self._scan_lock:
+            self.counters.incr("full_scans")
+            self._dirs, self._files = {}, {}
+            with self._dirty_lock:
+                self._dirty = set()
+            self._scan()
+            files = self._files
+        for path in sorted(files):
+            sch = files[path].schema
+            if sch is not None:
+                yield sch
 
-    def keys(self) -> Iterator[str]:
-        with self.ensure_cache():
-            yield from super().keys()
+    def refresh(self) -> int:
+        """
+        Bring the index up to date with the disk and return the generation.
 
-    def find(self) -> Iterator["schema.Schema"]:
-        """Iterate over the directory path and yield valid schemas."""
-        with self.ensure_cache() as cache:
-            for dirpath, dirnames, filenames in os.walk(self.path):
-                for filename in filenames:
-                    filepath = Path(dirpath, filename)
-                    match = self.matcher.check(str(filepath))
-                    if match:
-                        try:
-                            with filepath.open("r", encoding="utf-8") as fp:
-                                definition = json.load(fp)
-                        except BaseException:
-                            raise
-                        else:
-                            if schema.Schema.check(definition):
-                                sch = schema.Schema(definition, match, self)
-                                cache.setdefault(sch.name, []).append(sch)
-                                yield sch
+        If another thread is already scanning, this waits for it, and
+        then scans only if that scan started before this call was made.
+        """
+        self._refresh()
+        return self.generation
+
+    async def ascan(self) -> int:
+        """
+        Like :meth:`refresh`, but runs in the event loop's default executor.
+
+        Concurrent calls share a single in-flight scan.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        scan_loop, scan = self._scan_future
+        if scan is None or scan.done() or scan_loop is not loop:
+            scan = loop.run_in_executor(None, self.refresh)
+            self._scan_future = loop, scan
+        return await asyncio.shield(scan)
+
+    async def aget(self, name: str, default=None) -> Optional["versions.Versions"]:
+        """Like :meth:`get`, but scans in an executor when a scan is needed."""
+        if self._snapshot is None or self._dirty:
+            await self.ascan()
+        return self.get(name, default)
+
+    def invalidate(self, path: Optional[str] = None):
+        """
+        Mark a file or directory as stale.
+
+        The next lookup re-reads it even if its stat signature did not
+        change. Without a path, the whole index is dropped and the next
+        lookup scans from scratch.
+        """
+        if path is None:
+            # Not halfway through a scan, which would put its index back.
+            with self._scan_lock, self._snapshot_lock:
+                self._snapshot = None
+                self._dirs, self._files = {}, {}
+                with self._dirty_lock:
+                    self._dirty = set()
+        else:
+            path = os.path.abspath(path)
+            with self._dirty_lock:
+                self._dirty.update((path, os.path.dirname(path)))
+        if self.parent is not None:
+            self.parent._changed(self)
+
+    def by_id(self, uri: str) -> Optional["schema.Schema"]:
+        """
+        Return the schema whose ``$id`` is ``uri``, or ``None``.
+
+        For a layer of a :class:`~configkit.layered.LayeredDirectory`,
+        every layer is searched, so ``$ref`` s resolve across layers.
+        """
+        if self.parent is not None:
+            return self.parent.by_id(uri)
+        return self._local_by_id(uri)
+
+    def _local_by_id(self, uri: str) -> Optional["schema.Schema"]:
+        current = self._current()
+        found = current.ids.get(uri)
+        if found is None and current.unresolved:
+            found = self._resolve_lazy_id(current, uri)
+        return found
+
+    def load_many(
+        self,
+        requests: Iterable[Tuple[str, str, Optional[str]]],
+        use=None,
+        encoding="utf-8",
+        workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> List["schema.LoadResult"]:
+        """
+        Load and validate many files in one go.
+
+        ``requests`` are ``(path, name, version_spec)`` triples; each file
+        is validated against the newest version of ``name`` matching the
+        spec (any version if the spec is ``None``). Results come back as
+        in :meth:`Schema.load_many <configkit.schema.Schema.load_many>`.
+        """
+        jobs, results = [], {}
+        for index, (path, name, version_spec) in enumerate(requests):
+            vers = self.get(name)
+            sch, error = None, None
+            if vers is not None:
+                sch, error = schema.attempt(vers.newest, version_spec or ">=0")
+            if sch is None and error is None:
+                error = LookupError(
+                    "No schema {!r} matching {!r}".format(name, version_spec)
+                )
+            if error is not None:
+                results[index] = schema.LoadResult(path, None, error)
+            else:
+                jobs.append((index, (sch, path)))
+
+        loaded = schema.load_all(
+            (job for _, job in jobs), use, encoding, workers, executor
+        )
+        results.update(zip((index for index, _ in jobs), loaded))
+        return [results[index] for index in range(len(results))]
+
+    @property
+    def backend(self) -> "validation.IValidatorBackend":
+        """The backend that builds validators, unless a schema has its own."""
+        if self._backend is None:
+            from . import validation
+
+            return validation.default_backend
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend: Optional["validation.IValidatorBackend"]):
+        self._backend = backend
+
+    def resolver(self, base_uri: Optional[str], referrer: object) -> "RefResolver":
+        """Return a resolver that looks ``$ref``'d documents up in this directory."""
+        from . import validation
+
+        return validation.DirectoryResolver(self, base_uri or "", referrer)
+
+    def instrument(self, stage: str, **info):
+        """
+        Return a context manager that reports how long its block took.
+
+        The time goes to :attr:`observer`, or to the global observer if
+        this directory has none; ``info`` is passed along with it.
+        """
+        return observers.instrument(self.observer, stage, **info)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return a snapshot of the directory's counters.
+
+        Counts cover scans (``full_scans``, ``scans``, ``dirs_listed``),
+        schema files (``files_parsed``, ``schemas_checked``,
+        ``definitions_shared``), validators (``validators_built``,
+        ``validators_shared``, ``refs_resolved``, ``validations``) and
+        config files (``configs_read``, ``load_cache_hits``,
+        ``load_cache_misses``), alongside the current ``generation``.
+        """
+        stats = dict.fromkeys(_COUNTERS, 0)
+        stats.update(self.counters.snapshot())
+        stats["generation"] = self.generation
+        return stats
+
+    def watch(self, interval: float = 1.0) -> "watching.ConfigWatcher":
+        """Return a :class:`~configkit.watch.ConfigWatcher` for this directory."""
+        from . import watch as watching
+
+        return watching.ConfigWatcher(self, interval)
+
+    def save_manifest(self, path: Optional[str] = None):
+        """Write the index to ``path``, or to :attr:`manifest` if not given."""
+        path = self.manifest if path is None else path
+        if path is None:
+            raise ValueError("No manifest path given.")
+        self.refresh()
+        manifests.write(self, path)
+
+    def save_bundle(self, path: str):
+        """
+        Pack the index and every valid schema into a bundle at ``path``.
+
+        See :meth:`from_bundle` for loading it.
+        """
+        from . import bundle as bundles
+
+        self.refresh()
+        bundles.write(self, path)
+
+    def read_definition(self, path: str) -> Tuple[object, str]:
+        """Parse the schema at ``path``; return it with the sha256 of its source."""
+        return schema.read_definition(path, self.instrument)
+
+    def shared_definition(self, digest: Optional[str], definition: object) -> object:
+        """
+        Return the definition already parsed from a source with ``digest``.
+
+        If there is none yet, ``definition`` is kept for the next schema
+        whose source is the same, and returned.
+        """
+        if digest is None:
+            return definition
+        shared = self._definitions.setdefault(digest, definition)
+        if shared is not definition:
+            self.counters.incr("definitions_shared")
+        return shared
+
+    def memory_report(self) -> Dict[str, int]:
+        """
+        Return how many schemas the index holds, and roughly how much memory.
+
+        See :func:`configkit.memory.report`.
+        """
+        from . import memory
+
+        return memory.report(self)
 
     def schemas(
         self, version_spec: Optional[str] = None, sort_key=None, reverse=False
@@ -75,22 +446,259 @@ class Directory(Mapping):
 
     @contextmanager
     def scan_if_needed(self):
-        with self.ensure_cache() as cache:
-            if not cache:
-                for item in self.find():
-                    pass
-            yield cache
+        yield self._current().names
+
+    @property
+    def _cache(self) -> Optional[Dict[str, "versions.Versions"]]:
+        current = self._snapshot
+        return None if current is None else current.names
+
+    def _current(self) -> _Snapshot:
+        # The index to read from, scanning first if it is missing or stale.
+        current = self._snapshot
+        if current is None or self._dirty:
+            with self._scan_lock:
+                # Another thread may have scanned while this one waited.
+                current = self._snapshot
+                if current is None or self._dirty:
+                    current = self._refresh()
+        return current
+
+    def _refresh(self) -> _Snapshot:
+        # Any scan that starts from here on sees the disk as it is now.
+        wanted = self._scans_started + 1
+        with self._scan_lock:
+            if self._scans_done < wanted or self._snapshot is None:
+                self._scans_started += 1
+                if self._snapshot is None and not self._dirs:
+                    for item in self.find():
+                        pass
+                else:
+                    self._scan()
+                self._scans_done = self._scans_started
+            return self._snapshot
 
     @contextmanager
     def ensure_cache(self):
-        cache = {} if self._cache is None else self._cache
-        with self.use_cache(cache):
+        """Yield the index; kept for compatibility now that the index persists."""
+        with self.scan_if_needed() as cache:
             yield cache
 
     @contextmanager
     def use_cache(self, cache=None):
-        cache = {} if cache is None else cache
-        old_cache = self._cache
-        self._cache = cache
+        """Kept for compatibility; the index already outlives any context."""
         yield
-        self._cache = old_cache
+
+    def _scan(self):
+        self.counters.incr("scans")
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        dirs: Dict[str, _DirEntry] = {}
+        files: Dict[str, _FileEntry] = {}
+        stale: List[Tuple[str, matchers.SchemaInfo, FileSignature]] = []
+        # Stat results that came with a listing, so they aren't fetched twice.
+        fresh: Dict[str, os.stat_result] = {}
+        pending = [(os.path.abspath(self.path), 0)]
+
+        while pending:
+            dirpath, depth = pending.pop()
+            entry = self._dir_entry(dirpath, depth, fresh, dirty)
+            if entry is None:
+                continue
+            dirs[dirpath] = entry
+            pending.extend((subdir, depth + 1) for subdir in entry.subdirs)
+            self._check_files(entry, fresh, dirty, files, stale)
+
+        for (filepath, info, sig), sch in zip(stale, self._read(stale)):
+            files[filepath] = _FileEntry(sig, sch)
+
+        changed = self._cache is None or files.keys() != self._files.keys() or any(
+            files[path] is not self._files[path] for path in files
+        )
+        self._dirs, self._files = dirs, files
+
+        if changed:
+            by_name: Dict[str, list] = {}
+            for path in sorted(files):
+                sch = files[path].schema
+                if sch is not None:
+                    by_name.setdefault(sch.name, []).append(sch)
+            # Published before the generation moves on, so that whoever
+            # sees the new generation also sees the index that goes with it.
+            new = snapshot(
+                {
+                    name: versions.Versions(version_list)
+                    for name, version_list in by_name.items()
+                }
+            )
+            with self._snapshot_lock:
+                self._snapshot = new
+            self.generation += 1
+            self._forget_unused()
+            if self.parent is not None:
+                self.parent._changed(self)
+
+    def _dir_entry(
+        self, dirpath: str, depth: int, fresh: Dict[str, os.stat_result], dirty: set
+    ) -> Optional[_DirEntry]:
+        # The directory's listing, listed again only if it may have changed.
+        try:
+            mtime_ns = (fresh.pop(dirpath, None) or os.stat(dirpath)).st_mtime_ns
+        except OSError:
+            return None
+
+        entry = self._dirs.get(dirpath)
+        if entry is None or entry.mtime_ns != mtime_ns or dirpath in dirty:
+            entry = self._list(dirpath, depth, mtime_ns, fresh)
+        return entry
+
+    def _check_files(
+        self,
+        entry: _DirEntry,
+        fresh: Dict[str, os.stat_result],
+        dirty: set,
+        files: Dict[str, _FileEntry],
+        stale: list,
+    ):
+        # Keep the entries of unchanged files; queue the rest to be read.
+        for filepath, info in entry.files:
+            try:
+                sig = signature(fresh.pop(filepath, None) or os.stat(filepath))
+            except OSError:
+                continue
+
+            old = self._files.get(filepath)
+            if old is not None and old.signature == sig and filepath not in dirty:
+                files[filepath] = old
+            else:
+                stale.append((filepath, info, sig))
+
+    def _forget_unused(self):
+        # Drop the shared definitions and validators of removed files.
+        digests = {
+            entry.schema.digest
+            for entry in self._files.values()
+            if entry.schema is not None
+        }
+        self._definitions = {
+            digest: definition
+            for digest, definition in self._definitions.items()
+            if digest in digests
+        }
+        self._validators = {
+            key: shared for key, shared in self._validators.items() if key[0] in digests
+        }
+
+    def _resolve_lazy_id(
+        self, current: _Snapshot, uri: str
+    ) -> Optional["schema.Schema"]:
+        from jsonschema import SchemaError
+
+        # Read the schemas whose $id we don't know yet, starting with the
+        # ones whose filename matches the end of the uri. What is learnt
+        # goes into a new snapshot, unless a scan replaced this one.
+        basename = uri.rstrip("/").rsplit("/", 1)[-1]
+        with self._snapshot_lock:
+            latest = self._snapshot
+            if latest is not None and latest.names is current.names:
+                current = latest
+            found = current.ids.get(uri)
+            if found is not None or not current.unresolved:
+                return found
+
+            ids = dict(current.ids)
+            unresolved = sorted(
+                current.unresolved,
+                key=lambda sch: os.path.basename(sch.path) != basename,
+            )
+            while unresolved and found is None:
+                sch = unresolved.pop(0)
+                try:
+                    schema_id = sch.id
+                # Not a schema after all, or gone since the scan.
+                except (SchemaError, ValueError, OSError):
+                    continue
+                ids.setdefault(schema_id, sch)
+                if schema_id == uri:
+                    found = sch
+
+            if self._snapshot is current:
+                self._snapshot = _Snapshot(current.names, ids, tuple(unresolved))
+        return found
+
+    def _list(
+        self, dirpath: str, depth: int, mtime_ns: int, stats: Dict[str, os.stat_result]
+    ) -> Optional[_DirEntry]:
+        # The matcher sees paths relative to the root, and decides which
+        # subdirectories are worth listing at all. Stat results of what is
+        # kept are put in ``stats``; on Windows they come with the listing.
+        self.counters.incr("dirs_listed")
+        matcher = self.matcher
+        extensions = matcher.extensions
+        descend = matcher.max_depth is None or depth < matcher.max_depth
+        cut = len(os.path.join(os.path.abspath(self.path), ""))
+        files, subdirs = [], []
+
+        try:
+            with self.instrument("walk", path=dirpath):
+                listing = list(os.scandir(dirpath))
+        except OSError:
+            # Unreadable, or gone since it was stat'ed: skipped, like os.walk
+            # does, and listed again on the next scan.
+            return None
+
+        for entry in listing:
+            relpath = entry.path[cut:]
+            if entry.is_dir():
+                if descend and not entry.is_symlink() and not matcher.skip_dir(relpath):
+                    subdirs.append(entry.path)
+                    _stat_into(stats, entry)
+            elif extensions is None or entry.name.endswith(extensions):
+                with self.instrument("match", path=relpath):
+                    info = matcher.check(relpath)
+                if info:
+                    files.append((entry.path, matchers.interned(info)))
+                    _stat_into(stats, entry)
+        return _DirEntry(mtime_ns, tuple(files), tuple(subdirs))
+
+    def _read(self, stale: list) -> List[Optional["schema.Schema"]]:
+        if self.lazy:
+            return [
+                schema.Schema(None, info, self, path=filepath, checked=False)
+                for filepath, info, sig in stale
+            ]
+
+        self.counters.incr("files_parsed", len(stale))
+        self.counters.incr("schemas_checked", len(stale))
+        # Process pools can't report back to an observer in this process.
+        parse = schema.parse_file
+        if not pool.is_process_pool(self.executor):
+            parse = partial(parse, instrument=self.instrument)
+
+        parsed = pool.fan_out(
+            parse,
+            [filepath for filepath, info, sig in stale],
+            self.workers,
+            self.executor,
+        )
+        return [
+            schema.Schema(
+                self.shared_definition(digest, definition),
+                info,
+                self,
+                path=filepath,
+                digest=digest,
+            )
+            if valid
+            else None
+            for (filepath, info, sig), (definition, digest, valid) in zip(
+                stale, parsed
+            )
+        ]
+
+
+def _stat_into(stats: Dict[str, os.stat_result], entry: os.DirEntry):
+    try:
+        stats[entry.path] = entry.stat()
+    except OSError:
+        pass
@@ -0,0 +1,170 @@
+"""
+Read-only, hashable config instances.
+
+A :class:`FrozenDict` is a ``dict`` and a :class:`FrozenList` is a
+``list``, so validators and code that expects parsed JSON accept them
+as they are, but neither can be changed once built. They can be
+shared between threads and used as cache keys without copying, and
+``copy.deepcopy`` returns them as they are.
+
+>>> config = freeze({"server": {"hosts": ["a", "b"]}, "debug": False})
+>>> config.server.hosts
+FrozenList(['a', 'b'])
+>>> config.pointer("/server/hosts/1")
+'b'
+>>> config["debug"] = True
+Traceback (most recent call last):
+...
+TypeError: FrozenDict is read-only
+>>> hash(config) == hash(freeze({"debug": False, "server": {"hosts": ["a", "b"]}}))
+True
+"""
+
+from typing import Any, Iterable, Tuple
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("{} is read-only".format(type(self).__name__))
+
+
+class FrozenDict(dict):
+    """
+    A read-only ``dict``.
+
+    Keys that are valid identifiers, and don't clash with a ``dict``
+    method, can also be read as attributes.
+    """
+
+    __slots__ = ("_hash",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._hash = None
+
+    def __repr__(self) -> str:
+        return "FrozenDict({})".format(super().__repr__())
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash(frozenset(self.items()))
+        return self._hash
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def pointer(self, pointer: str) -> Any:
+        """Return the value at a JSON pointer (:rfc:`6901`) into this mapping."""
+        return resolve(self, pointer)
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
+class FrozenList(list):
+    """A read-only ``list``, hashable like a tuple."""
+
+    __slots__ = ("_hash",)
+
+    def __init__(self, items: Iterable[Any] = ()):
+        super().__init__(items)
+        self._hash = None
+
+    def __repr__(self) -> str:
+        return "FrozenList({})".format(super().__repr__())
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash(tuple(self))
+        return self._hash
+
+    def __reduce__(self):
+        return FrozenList, (list(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def pointer(self, pointer: str) -> Any:
+        """Return the value at a JSON pointer (:rfc:`6901`) into this list."""
+        return resolve(self, pointer)
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+
+def freeze(value: Any) -> Any:
+    """Return a read-only copy of a parsed instance; frozen parts are reused."""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def from_pairs(pairs: Iterable[Tuple[str, Any]]) -> FrozenDict:
+    """
+    An ``object_pairs_hook`` for :func:`json.loads` that freezes as it parses.
+
+    Objects nested in an object are already frozen by the time it is
+    built; only the arrays among its values still need to be.
+    """
+    frozen = FrozenDict(pairs)
+    for key, value in frozen.items():
+        if type(value) is list:
+            dict.__setitem__(frozen, key, _freeze_array(value))
+    return frozen
+
+
+def freeze_parsed(value: Any) -> Any:
+    """Finish freezing what :func:`from_pairs` parsed: a top-level array."""
+    return _freeze_array(value) if type(value) is list else value
+
+
+def _freeze_array(items: list) -> FrozenList:
+    return FrozenList(
+        _freeze_array(item) if type(item) is list else item for item in items
+    )
+
+
+def resolve(document: Any, pointer: str) -> Any:
+    """
+    Return the value at a JSON pointer (:rfc:`6901`) into a document.
+
+    >>> resolve({"a/b": [{"~": 1}]}, "/a~1b/0/~0")
+    1
+    """
+    if not pointer:
+        return document
+    if not pointer.startswith("/"):
+        raise ValueError("Not a JSON pointer: {!r}".format(pointer))
+    for part in pointer[1:].split("/"):
+        part = part.replace("~1", "/").replace("~0", "~")
+        if isinstance(document, list):
+            document = document[int(part)]
+        else:
+            document = document[part]
+    return document
+
+
+__all__ = ["FrozenDict", "FrozenList", "freeze", "from_pairs", "resolve"]
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,228 @@
+from . import directory as directories
+from . import schema
+from . import versions
+from collections.abc import Mapping
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+import os
+import threading
+
+
+class LayeredDirectory(Mapping):
+    """
+    Several schema directories seen as one.
+
+    ``layers`` are :class:`~configkit.directory.Directory` instances, or
+    paths to make one of with ``matcher`` and ``kwargs``. Like a
+    :class:`collections.ChainMap`, earlier layers take precedence: a
+    version of a schema in one layer hides the same version in the
+    layers after it, and so does a ``$id``. Other versions are merged,
+    so ``layered["config"].newest()`` considers every layer.
+
+    Names and ``$id`` s are kept in one merged index, so lookups take the
+    same time however many layers there are. When a layer changes (on
+    :meth:`refresh`, or after :meth:`invalidate`), only the names and
+    ids that changed in that layer are merged again. ``$ref`` s in any
+    layer are resolved against the merged ids.
+
+    A directory can only be a layer of one :class:`LayeredDirectory`.
+    As with a :class:`~configkit.directory.Directory`, lookups from
+    several threads need no locking: merges happen one at a time, on
+    copies of the merged index that then replace it.
+    """
+
+    def __init__(
+        self,
+        layers: Iterable[Union[str, "directories.Directory"]],
+        matcher=None,
+        **kwargs
+    ):
+        if matcher is not None:
+            kwargs["matcher"] = matcher
+        self.layers = [
+            directories.Directory(layer, **kwargs) if isinstance(layer, str) else layer
+            for layer in layers
+        ]
+        for layer in self.layers:
+            if layer.parent is not None:
+                raise ValueError(
+                    "{!r} is already a layer of {!r}".format(layer, layer.parent)
+                )
+        for layer in self.layers:
+            layer.parent = self
+
+        self.generation = 0
+        self._positions = {id(layer): pos for pos, layer in enumerate(self.layers)}
+        self._stale: Set[int] = set(range(len(self.layers)))
+        # What each layer looked like when it was last merged.
+        self._caches: List[Dict[str, versions.Versions]] = [{} for _ in self.layers]
+        self._layer_ids: List[Dict[str, schema.Schema]] = [{} for _ in self.layers]
+        # Positions of layers with schemas whose $id isn't known yet.
+        self._lazy: List[int] = []
+        self._cache: Dict[str, versions.Versions] = {}
+        self._ids: Dict[str, Tuple[int, schema.Schema]] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return "LayeredDirectory(layers={!r})".format(self.layers)
+
+    def __len__(self) -> int:
+        with self.scan_if_needed() as cache:
+            return len(cache)
+
+    def __iter__(self) -> Iterator[str]:
+        with self.scan_if_needed() as cache:
+            return (name for name in cache)
+
+    def __getitem__(self, key: str) -> "versions.Versions":
+        with self.scan_if_needed() as cache:
+            return cache[key]
+
+    def refresh(self) -> int:
+        """Bring every layer up to date with the disk and return the generation."""
+        for layer in self.layers:
+            layer.refresh()
+        with self._lock:
+            self._update()
+        return self.generation
+
+    def invalidate(self, path: Optional[str] = None):
+        """
+        Mark a file or directory as stale in the layers it belongs to.
+
+        Without a path, every layer is dropped and scanned from scratch
+        on the next lookup.
+        """
+        for layer in self.layers:
+            if path is None or _contains(layer.path, path):
+                layer.invalidate(path)
+
+    def by_id(self, uri: str) -> Optional["schema.Schema"]:
+        """Return the schema with ``$id`` ``uri`` from the first layer that has one."""
+        with self.scan_if_needed():
+            pos, found = self._ids.get(uri, (len(self.layers), None))
+            # Lazy layers may not know all of their ids until they look.
+            for lazy in self._lazy:
+                if lazy >= pos:
+                    break
+                sch = self.layers[lazy]._local_by_id(uri)
+                if sch is not None:
+                    return sch
+            return found
+
+    def stats(self) -> Dict[str, int]:
+        """Return the layers' :meth:`~configkit.directory.Directory.stats`, summed."""
+        stats: Dict[str, int] = {}
+        for layer in self.layers:
+            for name, count in layer.stats().items():
+                stats[name] = stats.get(name, 0) + count
+        stats["generation"] = self.generation
+        return stats
+
+    def load_many(
+        self,
+        requests: Iterable[Tuple[str, str, Optional[str]]],
+        use=None,
+        encoding="utf-8",
+        workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> List["schema.LoadResult"]:
+        """See :meth:`Directory.load_many <configkit.directory.Directory.load_many>`."""
+        return directories.Directory.load_many(
+            self, requests, use, encoding, workers, executor
+        )
+
+    def schemas(
+        self, version_spec: Optional[str] = None, sort_key=None, reverse=False
+    ) -> Iterator["schema.Schema"]:
+        return directories.Directory.schemas(self, version_spec, sort_key, reverse)
+
+    @contextmanager
+    def scan_if_needed(self):
+        # Layers report their changes through _changed, so there is
+        # nothing to check per layer here.
+        if self._stale:
+            with self._lock:
+                if self._stale:
+                    self._update()
+        yield self._cache
+
+    def _changed(self, layer: "directories.Directory"):
+        self._stale.add(self._positions[id(layer)])
+
+    def _update(self):
+        stale = sorted(self._stale)
+        for pos in stale:
+            with self.layers[pos].scan_if_needed():
+                pass
+        # Scanning a layer reports it as changed again; that's this update.
+        self._stale.difference_update(stale)
+
+        names: Set[str] = set()
+        uris: Set[str] = set()
+        for pos in stale:
+            current = self.layers[pos]._current()
+            old, new = self._caches[pos], current.names
+            names.update(
+                name
+                for name in old.keys() | new.keys()
+                if not _same(old.get(name), new.get(name))
+            )
+            old_ids, new_ids = self._layer_ids[pos], dict(current.ids)
+            uris.update(
+                uri
+                for uri in old_ids.keys() | new_ids.keys()
+                if old_ids.get(uri) is not new_ids.get(uri)
+            )
+            self._caches[pos], self._layer_ids[pos] = new, new_ids
+        self._lazy = [
+            pos for pos, layer in enumerate(self.layers) if layer._current().unresolved
+        ]
+
+        cache, ids = dict(self._cache), dict(self._ids)
+        for name in names:
+            merged = self._merge(name)
+            if merged:
+                cache[name] = versions.Versions(merged)
+            else:
+                cache.pop(name, None)
+
+        for uri in uris:
+            winner = next(
+                (
+                    (pos, ids[uri])
+                    for pos, ids in enumerate(self._layer_ids)
+                    if uri in ids
+                ),
+                None,
+            )
+            if winner is None:
+                ids.pop(uri, None)
+            else:
+                ids[uri] = winner
+
+        if names or uris:
+            self._cache, self._ids = cache, ids
+            self.generation += 1
+
+    def _merge(self, name: str) -> List["schema.Schema"]:
+        merged, seen = [], set()
+        for cache in self._caches:
+            found = cache.get(name, ())
+            merged.extend(sch for sch in found if sch.version not in seen)
+            seen.update(sch.version for sch in found)
+        return merged
+
+
+def _same(
+    old: Optional["versions.Versions"], new: Optional["versions.Versions"]
+) -> bool:
+    if old is None or new is None:
+        return old is new
+    return len(old) == len(new) and all(a is b for a, b in zip(old, new))
+
+
+def _contains(root: str, path: str) -> bool:
+    root, path = os.path.abspath(root), os.path.abspath(path)
+    return path == root or path.startswith(os.path.join(root, ""))
@@ -0,0 +1,382 @@
+"""
+Registry of config file formats.
+
+Each :class:`Format` knows how to parse an open text file (``load``), an
+in-memory buffer (``loads``) and, for multi-record formats, how to
+stream records one at a time (``iter_load``). Formats are registered
+once per :class:`LoaderRegistry` under a file extension, and every
+schema of a :class:`~configkit.directory.Directory` shares its
+directory's registry.
+
+:data:`default_registry` parses JSON with :mod:`json`, so that a file
+parses the same whatever is installed; :data:`orjson_format` is a
+faster, stricter alternative that has to be registered explicitly. For
+the other formats it picks the fastest backend available: PyYAML's
+libyaml-based ``CSafeLoader`` when PyYAML was built with it, and
+``tomllib``, ``tomli`` or ``toml`` for TOML, in that order. Backends
+are imported the first time a file of their format is parsed, not when
+this module is.
+
+Formats can also parse into read-only instances (see
+:mod:`configkit.frozen`). JSON is frozen as it is parsed; other formats
+are parsed as usual and frozen afterwards.
+"""
+
+from . import frozen as freezing
+from . import observers
+from collections.abc import Mapping
+from io import StringIO
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Union
+import importlib
+import json
+import mmap
+import os
+import re
+import stat
+
+Buffer = Union[str, bytes, bytearray, memoryview, mmap.mmap]
+
+
+def make_loader(fmt):
+    def load(*args, **kwargs):
+        raise ImportError(
+            "In order to use {0!r}, you must install the extra dependencies. e.g.: `pip install configkit[{0}]`.".format(
+                fmt
+            )
+        )
+
+    return load
+
+
+def decode(data: Buffer, encoding: str = "utf-8") -> str:
+    """Decode a buffer in one step, without copying it to ``bytes`` first."""
+    return data if isinstance(data, str) else str(data, encoding)
+
+
+# The modules that may provide each optional backend, in order of preference.
+_BACKENDS = {
+    "orjson": ("orjson",),
+    "yaml": ("yaml",),
+    "toml": ("tomllib", "tomli", "toml"),
+}
+
+
+def backend(name: str) -> Any:
+    """
+    Return the module behind an optional backend, or ``None``.
+
+    Backends are imported the first time they are asked for. They are
+    also available as attributes of this module, e.g. ``loaders.toml``.
+    """
+    try:
+        return globals()[name]
+    except KeyError:
+        pass
+
+    module = None
+    for candidate in _BACKENDS[name]:
+        try:
+            module = importlib.import_module(candidate)
+        except ImportError:
+            continue
+        break
+    globals()[name] = module
+    return module
+
+
+def __getattr__(name: str) -> Any:
+    if name in _BACKENDS:
+        return backend(name)
+    if name == "SafeLoader":
+        return _yaml_loader(_require("yaml"))
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def _require(name: str) -> Any:
+    module = backend(name)
+    if module is None:
+        make_loader(name)()
+    return module
+
+
+def json_loads(data: Buffer, encoding: str = "utf-8") -> Any:
+    return json.loads(decode(data, encoding))
+
+
+def json_loads_frozen(data: Buffer, encoding: str = "utf-8") -> Any:
+    return freezing.freeze_parsed(
+        json.loads(decode(data, encoding), object_pairs_hook=freezing.from_pairs)
+    )
+
+
+def json_load(fp) -> Any:
+    return json.load(fp)
+
+
+def orjson_loads(data: Buffer, encoding: str = "utf-8") -> Any:
+    orjson = _require("orjson")
+    if not isinstance(data, str) and encoding.lower().replace("-", "") != "utf8":
+        data = decode(data, encoding)
+    if isinstance(data, (str, bytes)):
+        return orjson.loads(data)
+    # orjson parses UTF-8 buffers directly, without decoding to str.
+    with memoryview(data) as view:
+        return orjson.loads(view)
+
+
+def orjson_loads_frozen(data: Buffer, encoding: str = "utf-8") -> Any:
+    return freezing.freeze(orjson_loads(data, encoding))
+
+
+def orjson_load(fp) -> Any:
+    return _require("orjson").loads(fp.read())
+
+
+_jsonc_tokens = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', re.DOTALL)
+
+
+def jsonc_loads(data: Buffer, encoding: str = "utf-8") -> Any:
+    """Parse JSON with ``//`` and ``/* */`` comments."""
+    return json_loads(_strip_comments(data, encoding))
+
+
+def jsonc_loads_frozen(data: Buffer, encoding: str = "utf-8") -> Any:
+    return json_loads_frozen(_strip_comments(data, encoding))
+
+
+def _strip_comments(data: Buffer, encoding: str) -> str:
+    return _jsonc_tokens.sub(lambda m: m.group(1) or "", decode(data, encoding))
+
+
+def iter_ndjson(fp) -> Iterator[Any]:
+    """
+    Parse a JSON Lines stream one record at a time, skipping blank lines.
+
+    A line that isn't valid JSON raises a :class:`ValueError` that says
+    which line of the stream it is.
+    """
+    for lineno, line in enumerate(fp, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json_loads(line)
+        except ValueError as exc:
+            raise ValueError("line {}: {}".format(lineno, exc)) from exc
+        yield record
+
+
+def _yaml_loader(yaml) -> Any:
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def yaml_load(fp) -> Any:
+    yaml = _require("yaml")
+    return yaml.load(fp, Loader=_yaml_loader(yaml))
+
+
+def yaml_loads(data: Buffer, encoding: str = "utf-8") -> Any:
+    yaml = _require("yaml")
+    # PyYAML reads str, bytes and file-like objects such as mmaps itself.
+    if isinstance(data, (bytearray, memoryview)):
+        data = decode(data, encoding)
+    return yaml.load(data, Loader=_yaml_loader(yaml))
+
+
+def yaml_load_all(fp) -> Iterator[Any]:
+    yaml = _require("yaml")
+    return yaml.load_all(fp, Loader=_yaml_loader(yaml))
+
+
+def toml_loads(data: Buffer, encoding: str = "utf-8") -> Any:
+    return _require("toml").loads(decode(data, encoding))
+
+
+def toml_load(fp) -> Any:
+    return _require("toml").loads(fp.read())
+
+
+class Format:
+    """
+    How to parse one config format.
+
+    Any of ``load``, ``loads`` and ``iter_load`` that is not given is
+    derived from the others where possible; e.g. a format that only has
+    ``iter_load`` loads a whole file as a list of its records. If
+    ``mmap`` is true, files are memory-mapped and handed to ``loads``.
+    ``frozen_loads`` is like ``loads``, but builds read-only instances
+    as it parses; without it, frozen instances are made from the
+    result of ``loads``.
+    """
+
+    __slots__ = ("_load", "_loads", "_iter_load", "_frozen_loads", "mmap")
+
+    def __init__(
+        self,
+        load: Optional[Callable[[Any], Any]] = None,
+        loads: Optional[Callable[[Buffer, str], Any]] = None,
+        iter_load: Optional[Callable[[Any], Iterable[Any]]] = None,
+        mmap: bool = False,
+        frozen_loads: Optional[Callable[[Buffer, str], Any]] = None,
+    ):
+        if load is None and loads is None and iter_load is None:
+            raise ValueError("A format needs at least one of load, loads or iter_load.")
+        self._load = load
+        self._loads = loads
+        self._iter_load = iter_load
+        self._frozen_loads = frozen_loads
+        self.mmap = mmap and loads is not None
+
+    def __repr__(self) -> str:
+        return "Format(load={!r}, loads={!r}, iter_load={!r}, mmap={!r})".format(
+            self._load, self._loads, self._iter_load, self.mmap
+        )
+
+    @property
+    def streamable(self) -> bool:
+        return self._iter_load is not None
+
+    def load(self, fp) -> Any:
+        if self._load is not None:
+            return self._load(fp)
+        if self._loads is not None:
+            return self._loads(fp.read())
+        return list(self._iter_load(fp))
+
+    def loads(self, data: Buffer, encoding: str = "utf-8", frozen=False) -> Any:
+        if frozen:
+            if self._frozen_loads is not None:
+                return self._frozen_loads(data, encoding)
+            return freezing.freeze(self.loads(data, encoding))
+        if self._loads is not None:
+            return self._loads(data, encoding)
+        return self.load(StringIO(decode(data, encoding)))
+
+    def iter_load(self, fp) -> Iterable[Any]:
+        if self._iter_load is None:
+            raise ValueError("This format holds a single record: {!r}".format(self))
+        return self._iter_load(fp)
+
+
+class LoaderRegistry(Mapping):
+    """A mapping of file extensions (without the dot) to :class:`Format`."""
+
+    def __init__(self, formats: Optional[Dict[str, Format]] = None):
+        self._formats = dict(formats or {})
+
+    def __repr__(self) -> str:
+        return "LoaderRegistry({!r})".format(sorted(self._formats))
+
+    def __len__(self) -> int:
+        return len(self._formats)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._formats)
+
+    def __getitem__(self, extension: str) -> Format:
+        return self._formats[extension]
+
+    def register(self, *extensions: str, **kwargs) -> Format:
+        """
+        Register a format for one or more extensions.
+
+        Takes either a ``format`` keyword with a :class:`Format`, or the
+        keyword arguments of :class:`Format` itself.
+        """
+        fmt = kwargs.pop("format", None) or Format(**kwargs)
+        for extension in extensions:
+            self._formats[extension.lstrip(".")] = fmt
+        return fmt
+
+    def copy(self) -> "LoaderRegistry":
+        return LoaderRegistry(self._formats)
+
+    def format_for(self, filename: str, format: Optional[str] = None) -> Format:
+        """Return the format named ``format``, or the one for ``filename``."""
+        extension = Path(filename).suffix[1:] if format is None else format
+        try:
+            return self._formats[extension]
+        except KeyError:
+            raise ValueError(
+                "Don't know how to load this file extension: {!r}".format(extension)
+            )
+
+    def read(
+        self,
+        filename: str,
+        use: Optional[Callable] = None,
+        encoding: str = "utf-8",
+        format: Optional[str] = None,
+        instrument: Optional[Callable] = None,
+        frozen=False,
+    ) -> Any:
+        """
+        Parse a file with ``use``, or with the format for its extension.
+
+        With ``frozen``, the result is made of read-only
+        :class:`~configkit.frozen.FrozenDict` and
+        :class:`~configkit.frozen.FrozenList` instances.
+
+        ``instrument`` is called as ``instrument(stage, path=filename)``
+        and must return a context manager; the file is read in a
+        ``"read"`` stage and parsed in a ``"parse"`` stage. Memory-mapped
+        files are paged in while they are parsed, and ``use`` gets an
+        open file, so for those the I/O shows up under ``"parse"``.
+        """
+        instrument = instrument or observers.uninstrumented
+        if use is not None:
+            with instrument("parse", path=filename):
+                with open(filename, encoding=encoding) as fp:
+                    instance = use(fp)
+                return freezing.freeze(instance) if frozen else instance
+
+        fmt = self.format_for(filename, format)
+        if not fmt.mmap:
+            with instrument("read", path=filename):
+                with open(filename, encoding=encoding) as fp:
+                    text = fp.read()
+            with instrument("parse", path=filename):
+                return fmt.loads(text, encoding, frozen)
+
+        # Parse straight out of a memory map rather than reading the raw
+        # bytes into memory first, which is what text mode would do.
+        with open(filename, "rb") as fp:
+            st = os.fstat(fp.fileno())
+            if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+                # Empty files, FIFOs and devices can't be mapped; they are
+                # read like any other file instead.
+                with instrument("read", path=filename):
+                    text = decode(fp.read(), encoding)
+                with instrument("parse", path=filename):
+                    return fmt.loads(text, encoding, frozen)
+            with instrument("read", path=filename):
+                data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            with instrument("parse", path=filename):
+                with data:
+                    return fmt.loads(data, encoding, frozen)
+
+    def loads(
+        self, data: Buffer, format: str, encoding: str = "utf-8", frozen=False
+    ) -> Any:
+        return self.format_for("", format).loads(data, encoding, frozen)
+
+
+default_registry = LoaderRegistry()
+default_registry.register(
+    "json", load=json_load, loads=json_loads, mmap=True, frozen_loads=json_loads_frozen
+)
+default_registry.register("jsonc", loads=jsonc_loads, frozen_loads=jsonc_loads_frozen)
+default_registry.register("ndjson", "jsonl", iter_load=iter_ndjson)
+default_registry.register(
+    "yaml", "yml", load=yaml_load, loads=yaml_loads, iter_load=yaml_load_all
+)
+default_registry.register("toml", load=toml_load, loads=toml_loads)
+
+#: JSON parsed with ``orjson``, which is faster than :mod:`json` but
+#: stricter: it rejects ``NaN`` and ``Infinity``, for one. Register it on
+#: a copy of :data:`default_registry` to use it, frozen loads included.
+orjson_format = Format(
+    load=orjson_load, loads=orjson_loads, mmap=True, frozen_loads=orjson_loads_frozen
+)
+
+__all__ = ["Format", "LoaderRegistry", "default_registry", "orjson_format"]
@@ -0,0 +1,123 @@
+"""
+Read and write index manifests.
+
+A manifest records everything a :class:`~configkit.directory.Directory`
+learned from a scan: the directory listings, each matched file's stat
+signature, its :class:`~configkit.matchers.SchemaInfo`, ``$id`` and the
+sha256 of its contents. A directory seeded from a manifest only has to
+stat the tree to know it is still current; schema bodies are read the
+first time they are used.
+"""
+
+from . import directory, matchers, schema
+from typing import Dict, List
+import json
+import os
+
+FORMAT = 1
+
+
+def dump(dir_: "directory.Directory") -> dict:
+    """Return the manifest for a scanned directory as a JSON-able dict."""
+    from jsonschema import SchemaError
+
+    root = os.path.abspath(dir_.path)
+    infos = {
+        path: info for entry in dir_._dirs.values() for path, info in entry.files
+    }
+    files = []
+
+    for path, entry in sorted(dir_._files.items()):
+        sch = entry.schema
+        if sch is not None:
+            try:
+                sch.definition
+            except (SchemaError, ValueError, OSError):
+                sch = None
+        files.append(
+            [
+                os.path.relpath(path, root),
+                list(entry.signature),
+                infos[path].name,
+                infos[path].version,
+                sch.id if sch else None,
+                sch.digest if sch else None,
+            ]
+        )
+
+    dirs = [
+        [
+            os.path.relpath(path, root),
+            entry.mtime_ns,
+            [os.path.relpath(sub, root) for sub in entry.subdirs],
+        ]
+        for path, entry in sorted(dir_._dirs.items())
+    ]
+
+    return {
+        "format": FORMAT,
+        "root": root,
+        "matcher": repr(dir_.matcher),
+        "dirs": dirs,
+        "files": files,
+    }
+
+
+def write(dir_: "directory.Directory", path: str):
+    """Atomically write the manifest for a directory to ``path``."""
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "w", encoding="utf-8") as fp:
+        json.dump(dump(dir_), fp, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def seed(dir_: "directory.Directory", manifest: dict) -> bool:
+    """
+    Seed a directory's index from a manifest.
+
+    Return ``False`` and leave the directory untouched if the manifest
+    was written for another root, matcher or manifest format.
+    """
+    root = os.path.abspath(dir_.path)
+    if (
+        manifest.get("format") != FORMAT
+        or manifest.get("root") != root
+        or manifest.get("matcher") != repr(dir_.matcher)
+    ):
+        return False
+
+    listings: Dict[str, List] = {}
+    files = {}
+
+    for relpath, sig, name, version, schema_id, digest in manifest["files"]:
+        path = os.path.join(root, relpath)
+        info = matchers.interned(matchers.SchemaInfo(name, version))
+        listings.setdefault(os.path.dirname(path), []).append((path, info))
+        sch = None
+        if digest is not None:
+            sch = schema.Schema(
+                None, info, dir_, path=path, digest=digest, schema_id=schema_id
+            )
+        files[path] = directory._FileEntry(directory.FileSignature(*sig), sch)
+
+    dirs = {}
+    for relpath, mtime_ns, subdirs in manifest["dirs"]:
+        path = os.path.normpath(os.path.join(root, relpath))
+        dirs[path] = directory._DirEntry(
+            mtime_ns,
+            tuple(listings.get(path, ())),
+            tuple(os.path.normpath(os.path.join(root, sub)) for sub in subdirs),
+        )
+
+    dir_._dirs, dir_._files = dirs, files
+    return True
+
+
+def read(dir_: "directory.Directory", path: str) -> bool:
+    """Seed a directory from the manifest at ``path``, if there is a usable one."""
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            manifest = json.load(fp)
+    except (OSError, ValueError):
+        return False
+    return seed(dir_, manifest)
@@ -1,19 +1,58 @@
 from abc import ABC, abstractmethod
-from typing import NamedTuple, Optional
+from fnmatch import fnmatchcase
+from typing import Iterable, NamedTuple, Optional, Tuple
+import os
 import re
+import sys
 
 
 SchemaInfo = NamedTuple(
     "SchemaInfo", [("name", str), ("version", Optional[str])])
 
 
+def interned(info: SchemaInfo) -> SchemaInfo:
+    """
+    Return ``info`` with its name and version interned.
+
+    Directories keep one copy of each name and version string, however
+    many files they are found in.
+    """
+    name, version = info
+    return SchemaInfo(sys.intern(name), version and sys.intern(version))
+
+
+#: Directories that never hold schemas, skipped by the built-in matchers.
+DEFAULT_EXCLUDE_DIRS = (
+    ".git", ".hg", ".svn", ".tox", ".venv", "node_modules", "__pycache__")
+
+
 class IMatcher(ABC):
-    """ABC that checks if a filepath refers to a schema."""
+    """
+    ABC that checks if a filepath refers to a schema.
+
+    Paths are relative to the root of the directory being scanned. A
+    matcher can also tell the scan what to leave out entirely:
+
+    - ``max_depth``: how many directories deep schema files can be;
+      ``0`` means only files directly in the root.
+    - ``extensions``: the only file extensions that can be schemas.
+    - ``exclude_dirs``: glob patterns for directory names that are
+      skipped along with everything under them (see :meth:`skip_dir`).
+    """
+
+    max_depth: Optional[int] = None
+    extensions: Optional[Tuple[str, ...]] = None
+    exclude_dirs: Tuple[str, ...] = ()
 
     @abstractmethod
     def check(self, path: str) -> Optional[SchemaInfo]:
         """Return a SchemaInfo if the given path refers to a schema"""
 
+    def skip_dir(self, path: str) -> bool:
+        """Return True if the directory at ``path`` should not be scanned."""
+        name = os.path.basename(path)
+        return any(fnmatchcase(name, pattern) for pattern in self.exclude_dirs)
+
 
 class RegexMatcher(IMatcher):
     """
@@ -29,14 +68,33 @@ class RegexMatcher(IMatcher):
     SchemaInfo(name='foo', version='bar')
     >>> sm.check("foo.json")
     SchemaInfo(name='foo', version=None)
+    >>> sm = RegexMatcher(r"(?P<name>.+).json$", exclude_dirs=["data*"])
+    >>> sm.skip_dir("schemas/data-2020")
+    True
 
     """
 
-    def __init__(self, pattern: str):
+    def __init__(
+        self,
+        pattern: str,
+        max_depth: Optional[int] = None,
+        extensions: Optional[Iterable[str]] = None,
+        exclude_dirs: Iterable[str] = (),
+    ):
         self.pattern = pattern
+        self.max_depth = max_depth
+        self.extensions = None if extensions is None else tuple(
+            "." + ext.lstrip(".") for ext in extensions)
+        self.exclude_dirs = tuple(exclude_dirs)
 
     def __repr__(self):
-        return "RegexMatcher(r{!r})".format(self.pattern)
+        options = "".join(
+            ", {}={!r}".format(option, getattr(self, option))
+            for option, default in [
+                ("max_depth", None), ("extensions", None), ("exclude_dirs", ())]
+            if getattr(self, option) != default
+        )
+        return "RegexMatcher(r{!r}{})".format(self.pattern, options)
 
     def check(self, path: str) -> Optional[SchemaInfo]:
         match = self._regexp.search(path)
@@ -60,11 +118,13 @@ class RegexMatcher(IMatcher):
 
 
 version_name_matcher = RegexMatcher(
-    r"(?:(?P<version>[^/\\]+?)(?:/|\\))?(?P<name>[^/\\]+?).json")
+    r"(?:(?P<version>[^/\\]+?)(?:/|\\))?(?P<name>[^/\\]+?).json",
+    extensions=["json"], exclude_dirs=DEFAULT_EXCLUDE_DIRS)
 name_version_matcher = RegexMatcher(
-    r"(?P<name>[^/\\]+?)(?:(?:/|\\)(?P<version>[^/\\]+?))?.json$")
+    r"(?P<name>[^/\\]+?)(?:(?:/|\\)(?P<version>[^/\\]+?))?.json$",
+    extensions=["json"], exclude_dirs=DEFAULT_EXCLUDE_DIRS)
 
-__all__ = ['SchemaInfo', 'IMatcher', 'RegexMatcher',
+__all__ = ['SchemaInfo', 'IMatcher', 'RegexMatcher', 'DEFAULT_EXCLUDE_DIRS',
            'version_name_matcher', 'name_version_matcher']
 
 
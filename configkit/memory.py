@@ -0,0 +1,76 @@
+"""
+Estimate how much memory a directory's index takes.
+
+Sizes come from :func:`sys.getsizeof`, summed over the containers and
+strings reachable from what is measured. Objects that are shared, such
+as definitions parsed once for several identical files, or interned
+names and versions, are only counted once.
+"""
+
+from . import directory as directories
+from typing import Any, Dict
+import sys
+
+
+def sizeof(*objects: Any) -> int:
+    """
+    Return the size in bytes of ``objects`` and the JSON-like data they hold.
+
+    >>> names = ["config", "config"]
+    >>> sizeof(names) == sys.getsizeof(names) + sys.getsizeof("config")
+    True
+    """
+    seen = set()
+    total = 0
+    pending = list(objects)
+
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pending.extend(obj)
+    return total
+
+
+def report(dir_: "directories.Directory") -> Dict[str, int]:
+    """
+    Report what a directory's index holds.
+
+    Counts are of ``schemas``, of the ``definitions`` and ``validators``
+    they have loaded, and how many of those are ``unique_definitions``
+    and ``unique_validators``. Sizes are in bytes: ``index_bytes`` for
+    the names and :class:`~configkit.versions.Versions`,
+    ``schema_bytes`` for the schema objects with their paths and infos,
+    and ``definition_bytes`` for the distinct parsed definitions.
+    """
+    with dir_.scan_if_needed() as cache:
+        versions = list(cache.values())
+        schemas = list({id(sch): sch for vers in versions for sch in vers}.values())
+        # sizeof doesn't look inside a Versions; its list is counted here.
+        index_bytes = sizeof(cache)
+        index_bytes += sum(sys.getsizeof(vers.versions) for vers in versions)
+
+    definitions = [sch._definition for sch in schemas if sch._definition is not None]
+    validators = [sch._validator for sch in schemas if sch._validator is not None]
+    return {
+        "schemas": len(schemas),
+        "definitions": len(definitions),
+        "unique_definitions": len({id(definition) for definition in definitions}),
+        "validators": len(validators),
+        "unique_validators": len({id(validator) for validator in validators}),
+        "index_bytes": index_bytes,
+        "schema_bytes": sum(sys.getsizeof(sch) for sch in schemas)
+        + sizeof(*[(sch.path, sch.info, sch.digest) for sch in schemas]),
+        "definition_bytes": sizeof(*definitions),
+    }
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,112 @@
+"""
+Instrumentation for the scan/load/validate pipeline.
+
+Every :class:`~configkit.directory.Directory` keeps cheap, always-on
+:class:`Counters`, available through its ``stats()`` method. For
+timings, pass an :class:`IObserver` to the directory, or install one for
+every directory with :func:`set_observer`. Observers are told about the
+following stages, with the time each one took:
+
+``walk``
+    listing one directory of the schema tree
+``match``
+    running the matcher on one listed file
+``read``
+    reading a schema or config file from disk
+``parse``
+    turning the file's contents into Python objects
+``check``
+    checking a schema against the meta-schema
+``resolver``
+    building a schema's validator and resolver
+``resolve``
+    fetching the document for a ``$ref``
+``validate``
+    validating an instance
+"""
+
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional
+import threading
+import time
+
+STAGES = ("walk", "match", "read", "parse", "check", "resolver", "resolve", "validate")
+
+
+class IObserver(ABC):
+    """ABC that receives timed pipeline events."""
+
+    @abstractmethod
+    def event(self, stage: str, duration: float, **info) -> None:
+        """Called after ``stage`` took ``duration`` seconds; ``info`` says on what."""
+
+
+class Counters:
+    """Thread-safe event counters."""
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return "Counters({!r})".format(self.snapshot())
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+class _Untimed:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+untimed = _Untimed()
+
+
+def uninstrumented(stage: str, **info) -> _Untimed:
+    """Stand-in for :meth:`Directory.instrument` where nobody is listening."""
+    return untimed
+
+
+observer: Optional[IObserver] = None
+
+
+def set_observer(new: Optional[IObserver]) -> Optional[IObserver]:
+    """Install an observer for directories that don't have their own; return the old one."""
+    global observer
+    old, observer = observer, new
+    return old
+
+
+@contextmanager
+def timed(target: IObserver, stage: str, info: dict):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        target.event(stage, time.perf_counter() - start, **info)
+
+
+def instrument(target: Optional[IObserver], stage: str, **info):
+    """Return a context manager that reports how long its block took."""
+    target = observer if target is None else target
+    if target is None:
+        return untimed
+    return timed(target, stage, info)
+
+
+__all__ = ["IObserver", "Counters", "STAGES", "set_observer", "instrument"]
@@ -0,0 +1,37 @@
+"""Helpers for fanning work out over an executor."""
+
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, TypeVar
+import sys
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def is_process_pool(executor: Optional[Executor]) -> bool:
+    """Tell whether ``executor`` is a process pool, without importing one."""
+    process = sys.modules.get("concurrent.futures.process")
+    return process is not None and isinstance(executor, process.ProcessPoolExecutor)
+
+
+def fan_out(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> List[R]:
+    """
+    Call ``fn`` on every item and return the results in the same order.
+
+    The calls are spread over ``executor`` if one is given, or over a
+    thread pool of ``workers`` threads. Otherwise they are made serially
+    in the calling thread. When a process pool is used, ``fn`` and the
+    items must be picklable.
+    """
+    items = list(items)
+    if executor is not None and items:
+        return list(executor.map(fn, items))
+    if workers is not None and workers > 1 and len(items) > 1:
+        with ThreadPoolExecutor(min(workers, len(items))) as pool:
+            return list(pool.map(fn, items))
+    return [fn(item) for item in items]
@@ -1,42 +1,177 @@
-from . import matchers, directory
-from collections import namedtuple
-from jsonschema import Draft7Validator as Validator, RefResolver
-from pathlib import Path
-from typing import Any, Optional
+from . import matchers, directory, pool
+from . import cache as caching
+from . import loaders
+from . import frozen as freezing
+from . import observers
+from concurrent.futures import Executor
+from functools import partial
+from itertools import islice
+from operator import attrgetter
+from pathlib import PurePath
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+from urllib.parse import urldefrag, urljoin
+import hashlib
 import json
+import os
 
-FakeModule = namedtuple("fakemodule", ["load", "safe_load"])
+if TYPE_CHECKING:
+    from . import validation
+    from jsonschema import ValidationError
 
+_unknown = object()
 
-def make_loader(fmt):
-    def load(fp):
-        raise ImportError(
-            "In order to use {0!r}, you must install the extra dependencies. e.g.: `pip install configkit[{0}]`.".format(
-                fmt
-            )
+LoadResult = NamedTuple(
+    "LoadResult", [("path", str), ("instance", Any), ("error", Optional[Exception])]
+)
+
+
+def read_definition(
+    path: str, instrument: Optional[Callable] = None
+) -> Tuple[Any, str]:
+    """Parse a JSON schema file and return it with the sha256 of its contents."""
+    instrument = instrument or observers.uninstrumented
+    with instrument("read", path=path):
+        with open(path, "rb") as fp:
+            data = fp.read()
+    with instrument("parse", path=path):
+        definition = json.loads(data.decode("utf-8"))
+    return definition, hashlib.sha256(data).hexdigest()
+
+
+def attempt(fn: Callable, arg: Any) -> Tuple[Any, Optional[Exception]]:
+    """Call ``fn(arg)``, returning the result or the exception it raised."""
+    try:
+        return fn(arg), None
+    except Exception as exc:
+        return None, exc
+
+
+def _read_job(job: Tuple[str, "loaders.LoaderRegistry", bool], use, encoding) -> Any:
+    filename, formats, frozen = job
+    return formats.read(filename, use, encoding, frozen=frozen)
+
+
+def load_all(
+    jobs: Iterable[Tuple["Schema", str]],
+    use: Optional[Callable] = None,
+    encoding: str = "utf-8",
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> List[LoadResult]:
+    """
+    Load and validate each file against its schema.
+
+    Failures are returned in the results rather than raised. Files are
+    parsed and validated on ``executor`` or a pool of ``workers``
+    threads; with a process pool only parsing happens in the pool, and
+    validation happens in the calling process.
+    """
+    # Validators are built up front, so that workers share them. A schema
+    # that turns out to be invalid only fails the files loaded against it.
+    jobs = list(jobs)
+    failed = [attempt(attrgetter("validator"), sch)[1] for sch, filename in jobs]
+    all_jobs, jobs = jobs, [job for job, error in zip(jobs, failed) if error is None]
+
+    if pool.is_process_pool(executor):
+        parsed = pool.fan_out(
+            partial(attempt, partial(_read_job, use=use, encoding=encoding)),
+            [(filename, sch.formats, sch.directory.frozen) for sch, filename in jobs],
+            executor=executor,
+        )
+        outcomes = [
+            (None, error) if error is not None else attempt(sch.validate, instance)
+            for (sch, filename), (instance, error) in zip(jobs, parsed)
+        ]
+    else:
+        outcomes = pool.fan_out(
+            lambda job: attempt(
+                partial(job[0].load, use=use, encoding=encoding), job[1]
+            ),
+            jobs,
+            workers,
+            executor,
         )
 
-    return load
+    outcomes = iter(outcomes)
+    return [
+        LoadResult(filename, None, error)
+        if error is not None
+        else LoadResult(filename, *next(outcomes))
+        for (sch, filename), error in zip(all_jobs, failed)
+    ]
+
 
+def find_refs(definition: Any, base_uri: Optional[str] = None) -> FrozenSet[str]:
+    """Return the absolute URIs of the documents a definition ``$ref``s."""
+    found = set()
+    pending = [(definition, base_uri or "")]
+
+    while pending:
+        node, base = pending.pop()
+        if isinstance(node, dict):
+            if isinstance(node.get("$id"), str):
+                base = urljoin(base, node["$id"])
+            ref = node.get("$ref")
+            if isinstance(ref, str):
+                uri = urldefrag(urljoin(base, ref))[0]
+                if uri:
+                    found.add(uri)
+            pending.extend(
+                (value, base)
+                for key, value in node.items()
+                if key not in ("enum", "const")
+            )
+        elif isinstance(node, list):
+            pending.extend((item, base) for item in node)
 
-try:
-    import yaml
-except BaseException:
-    yaml = FakeModule(make_loader("yaml"), make_loader("yaml"))
+    return frozenset(found)
 
-try:
-    import toml
-except BaseException:
-    toml = FakeModule(make_loader("toml"), None)
+
+def parse_file(
+    path: str, instrument: Optional[Callable] = None
+) -> Tuple[Any, str, bool]:
+    """Read a schema file and also say whether it holds a valid schema."""
+    instrument = instrument or observers.uninstrumented
+    definition, digest = read_definition(path, instrument)
+    with instrument("check", path=path):
+        valid = Schema.check(definition)
+    return definition, digest, valid
 
 
 class Schema:
-    __slots__ = ("definition", "info", "directory", "formats")
+    __slots__ = (
+        "_definition",
+        "_id",
+        "_checked",
+        "info",
+        "directory",
+        "path",
+        "digest",
+        "_refs",
+        "_validator",
+        "_validator_generation",
+        "_dependencies",
+        "_backend",
+    )
 
     @staticmethod
     def check(definition):
+        from jsonschema import Draft7Validator
+
         try:
-            Validator.check_schema(definition)
+            Draft7Validator.check_schema(definition)
         except BaseException:
             return False
         else:
@@ -47,47 +182,383 @@ class Schema:
         definition: Any,
         info: "matchers.SchemaInfo",
         directory: "directory.Directory",
+        path: Optional[str] = None,
+        digest: Optional[str] = None,
+        schema_id: Optional[str] = _unknown,
+        checked: bool = True,
     ):
-        self.definition = definition
+        """
+        :param definition: the parsed schema, or ``None`` to read it from
+                           ``path`` the first time it is needed
+        :param path: the file the schema was read from
+        :param digest: sha256 of the file contents
+        :param schema_id: the schema's ``$id``, if already known
+        :param checked: whether the definition is known to be a valid
+                        schema; if not, it is checked when it is read
+        """
+        self._definition = definition
+        self._id = schema_id
+        self._checked = checked
         self.info = info
         self.directory = directory
-        self.formats = {"json": json.load, "yaml": yaml.safe_load, "toml": toml.load}
+        self.path = path
+        self.digest = digest
+        self._refs = None
+        self._validator = None
+        self._validator_generation = None
+        self._dependencies = {}
+        self._backend = None
+
+    @property
+    def formats(self) -> "loaders.LoaderRegistry":
+        """The loaders available to :meth:`load`: the directory's registry."""
+        return self.directory.loaders
+
+    @property
+    def backend(self) -> "validation.IValidatorBackend":
+        """The backend that builds :attr:`validator`: the directory's, unless set."""
+        return self.directory.backend if self._backend is None else self._backend
+
+    @backend.setter
+    def backend(self, backend: Optional["validation.IValidatorBackend"]):
+        self._backend = backend
+        self._validator = None
 
     def __hash__(self):
         return hash((self.id,))
 
-    def load(self, filename: str, use=None, encoding="utf-8"):
-        path = Path(filename)
+    def load(
+        self,
+        filename: str,
+        use=None,
+        encoding="utf-8",
+        cache: Optional["caching.LoadCache"] = None,
+        fail_fast: Optional[bool] = None,
+        frozen: Optional[bool] = None,
+    ):
+        """
+        Load a config file and validate it against this schema.
+
+        ``fail_fast`` is passed on to :meth:`validate`. With ``frozen``
+        (by default, the directory's ``frozen``), the config is built
+        out of :class:`~configkit.frozen.FrozenDict` and
+        :class:`~configkit.frozen.FrozenList` while it is parsed, and
+        can be shared without copying.
 
-        if use is not None:
-            load = use
-        else:
-            if path.suffix[1:] not in self.formats:
-                print(path.suffix[1:])
+        If a :class:`~configkit.cache.LoadCache` is given, or the
+        directory has one as its ``load_cache``, loading a file whose
+        stat signature has not changed returns the instance from the
+        previous load without reading or validating anything. Since
+        such instances are shared, they are always frozen.
+        """
+        directory = self.directory
+        frozen = directory.frozen if frozen is None else frozen
+        cache = directory.load_cache if cache is None else cache
+        if cache is None:
+            return self.validate(self._read(filename, use, encoding, frozen), fail_fast)
+
+        path = os.path.realpath(filename)
+        st = os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size, self.id, self.info, use, encoding)
+        validator = self.validator
+
+        cached = cache.get(key, _unknown)
+        if cached is not _unknown and cached[0] is validator:
+            directory.counters.incr("load_cache_hits")
+            return cached[1]
+
+        directory.counters.incr("load_cache_misses")
+        instance = self.validate(self._read(path, use, encoding, True), fail_fast)
+        cache.put(key, (validator, instance), st.st_size)
+        return instance
+
+    def _read(self, filename: str, use, encoding: str, frozen=False) -> Any:
+        self.directory.counters.incr("configs_read")
+        return self.formats.read(
+            filename,
+            use,
+            encoding,
+            instrument=self.directory.instrument,
+            frozen=frozen,
+        )
+
+    def loads(
+        self,
+        data: "loaders.Buffer",
+        format: str = "json",
+        encoding="utf-8",
+        frozen: Optional[bool] = None,
+    ):
+        """
+        Parse and validate a config held in memory.
+
+        ``data`` can be a ``str`` or any bytes-like buffer, including a
+        ``memoryview`` or an ``mmap``; buffers are decoded in one step
+        with ``encoding``, without an intermediate ``bytes`` copy, or
+        not decoded at all if the format's backend parses bytes.
+        ``frozen`` is as in :meth:`load`.
+        """
+        frozen = self.directory.frozen if frozen is None else frozen
+        return self.validate(self.formats.loads(data, format, encoding, frozen))
+
+    def iter_load(
+        self,
+        filename: str,
+        format: Optional[str] = None,
+        use=None,
+        encoding="utf-8",
+        frozen: Optional[bool] = None,
+    ) -> Iterator[Any]:
+        """
+        Lazily load and validate the records in a multi-record file.
+
+        JSON Lines (``.ndjson``/``.jsonl``) and multi-document YAML are
+        read one record at a time, so memory use does not grow with the
+        size of the file. ``format`` overrides the file extension, and
+        ``use`` can be any callable that turns an open file into an
+        iterable of records.
+
+        When a record does not validate, the :class:`ValidationError`'s
+        ``path`` starts with the index of that record. When a JSON Lines
+        record can't be parsed, the :class:`ValueError` gives its line
+        number; PyYAML's errors already give a position in the file. ``frozen`` is as
+        in :meth:`load`; records are frozen after they are parsed.
+        """
+        if use is None:
+            fmt = self.formats.format_for(filename, format)
+            if not fmt.streamable:
                 raise ValueError(
-                    "Don't know how to load this file extension: {!r}".format(
-                        path.suffix
-                    )
+                    "Don't know how to stream this format: {!r}".format(fmt)
                 )
-            else:
-                load = self.formats[path.suffix[1:]]
+            use = fmt.iter_load
+
+        validator = self.validator
+        directory = self.directory
+        frozen = directory.frozen if frozen is None else frozen
+        directory.counters.incr("configs_read")
+        with open(filename, encoding=encoding) as fp:
+            for index, record in enumerate(use(fp)):
+                if frozen:
+                    record = freezing.freeze(record)
+                directory.counters.incr("validations")
+                with directory.instrument("validate", path=filename, record=index):
+                    error = next(validator.iter_errors(record), None)
+                if error is not None:
+                    error.path.appendleft(index)
+                    raise error
+                yield record
+
+    async def aload(
+        self,
+        filename: str,
+        use=None,
+        encoding="utf-8",
+        cache: Optional["caching.LoadCache"] = None,
+        fail_fast: Optional[bool] = None,
+        frozen: Optional[bool] = None,
+    ):
+        """Like :meth:`load`, but runs in the event loop's default executor."""
+        import asyncio
 
-        with path.open(encoding=encoding) as fp:
-            instance = load(fp)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, partial(self.load, filename, use, encoding, cache, fail_fast, frozen)
+        )
+
+    async def aload_many(
+        self,
+        filenames: Iterable[str],
+        use=None,
+        encoding="utf-8",
+        workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> List[LoadResult]:
+        """Like :meth:`load_many`, but without blocking the event loop."""
+        import asyncio
 
-        resolver = RefResolver(
-            self.id,
-            self.definition,
-            {sch.id: sch.definition for sch in self.directory.schemas()},
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            partial(self.load_many, list(filenames), use, encoding, workers, executor),
         )
-        validator = Validator(self.definition, resolver=resolver)
-        validator.validate(instance)
 
+    def load_many(
+        self,
+        filenames: Iterable[str],
+        use=None,
+        encoding="utf-8",
+        workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> List[LoadResult]:
+        """
+        Load and validate many files against this schema.
+
+        One :class:`LoadResult` is returned per file, in order; files
+        that fail to load or validate carry the exception as ``error``
+        instead of stopping the batch. See :func:`load_all` for how
+        ``workers`` and ``executor`` are used.
+        """
+        return load_all(
+            ((self, filename) for filename in filenames),
+            use,
+            encoding,
+            workers,
+            executor,
+        )
+
+    def validate(self, instance: Any, fail_fast: Optional[bool] = None) -> Any:
+        """
+        Validate an already parsed instance and return it.
+
+        With ``fail_fast`` (by default, the directory's ``fail_fast``),
+        validation stops at the first failing keyword, and the
+        :class:`ValidationError` raised only says the instance is
+        invalid, without a path or message for what failed.
+        """
+        directory = self.directory
+        fail_fast = directory.fail_fast if fail_fast is None else fail_fast
+        validator = self.validator
+        directory.counters.incr("validations")
+        with directory.instrument("validate", schema=self.path):
+            if not fail_fast:
+                validator.validate(instance)
+            elif not validator.is_valid(instance):
+                from jsonschema import ValidationError
+
+                raise ValidationError(
+                    "Instance is not valid under {}".format(self.id or self.path),
+                    instance=instance,
+                    schema=self.definition,
+                )
         return instance
 
+    def is_valid(self, path_or_instance: Any, use=None, encoding="utf-8") -> bool:
+        """
+        Return whether a config file, or a parsed instance, is valid.
+
+        A ``str`` or :class:`~pathlib.PurePath` is taken to be the path
+        of a file, which is read like :meth:`load` does. No error is
+        built for an invalid instance.
+        """
+        instance = self._instance(path_or_instance, use, encoding)
+        validator = self.validator
+        self.directory.counters.incr("validations")
+        with self.directory.instrument("validate", schema=self.path):
+            return validator.is_valid(instance)
+
+    def iter_errors(
+        self,
+        path_or_instance: Any,
+        limit: Optional[int] = None,
+        use=None,
+        encoding="utf-8",
+    ) -> Iterator["ValidationError"]:
+        """
+        Yield the validation errors of a config file or a parsed instance.
+
+        Errors are found lazily, and no more than ``limit`` are looked
+        for. Paths are told apart from instances as in :meth:`is_valid`.
+        """
+        instance = self._instance(path_or_instance, use, encoding)
+        self.directory.counters.incr("validations")
+        return islice(self.validator.iter_errors(instance), limit)
+
+    def _instance(self, path_or_instance: Any, use, encoding: str) -> Any:
+        if isinstance(path_or_instance, (str, PurePath)):
+            return self._read(str(path_or_instance), use, encoding)
+        return path_or_instance
+
+    @property
+    def validator(self) -> "validation.IValidator":
+        """
+        The validator for this schema, as built by :attr:`backend`.
+
+        It is built the first time it is needed, and rebuilt when one of
+        the schemas it depends on (see :meth:`dependencies`) changes in
+        the directory. Schemas of the directory read from identical
+        files share their validator.
+        """
+        directory = self.directory
+        # Layers of a LayeredDirectory can depend on each other's schemas.
+        index = directory if directory.parent is None else directory.parent
+        generation = index.generation
+
+        if self._validator is not None and self._validator_generation != generation:
+            if any(
+                index.by_id(uri) is not sch
+                for uri, sch in self._dependencies.items()
+            ):
+                self._validator = None
+            self._validator_generation = generation
+
+        if self._validator is None:
+            # Read the definition first, so that isn't timed as building.
+            self.definition
+            key = (self.digest, self.backend)
+            validator, dependencies = directory._validators.get(key, (None, {}))
+            if validator is not None and all(
+                index.by_id(uri) is sch for uri, sch in dependencies.items()
+            ):
+                directory.counters.incr("validators_shared")
+            else:
+                with directory.instrument("resolver", schema=self.path):
+                    dependencies = self.dependencies()
+                    validator = self.backend.build(self)
+                directory.counters.incr("validators_built")
+                if self.digest is not None:
+                    directory._validators[key] = validator, dependencies
+            self._validator, self._dependencies = validator, dependencies
+            self._validator_generation = generation
+        return self._validator
+
+    @property
+    def refs(self) -> FrozenSet[str]:
+        """The URIs of the documents this schema ``$ref``s directly."""
+        if self._refs is None:
+            self._refs = find_refs(self.definition, self.id)
+        return self._refs
+
+    def dependencies(self) -> Dict[str, Optional["Schema"]]:
+        """
+        Return every schema this one refers to, directly or not.
+
+        The result maps each referenced ``$id`` to the schema the
+        directory currently has for it, or ``None`` if it has none.
+        """
+        found: Dict[str, Optional[Schema]] = {}
+        pending = list(self.refs)
+
+        while pending:
+            uri = pending.pop()
+            if uri not in found:
+                sch = found[uri] = self.directory.by_id(uri)
+                if sch is not None and sch is not self:
+                    pending.extend(sch.refs)
+
+        return found
+
+    @property
+    def definition(self) -> Any:
+        if self._definition is None:
+            directory = self.directory
+            definition, digest = directory.read_definition(self.path)
+            directory.counters.incr("files_parsed")
+            if not self._checked or digest != self.digest:
+                directory.counters.incr("schemas_checked")
+                from jsonschema import Draft7Validator
+
+                with directory.instrument("check", path=self.path):
+                    Draft7Validator.check_schema(definition)
+            self._definition = directory.shared_definition(digest, definition)
+            self.digest = digest
+        return self._definition
+
     @property
     def id(self) -> Optional[str]:
-        return self.definition.get("$id")
+        if self._id is _unknown:
+            definition = self.definition
+            self._id = definition.get("$id") if isinstance(definition, dict) else None
+        return self._id
 
     @property
     def name(self) -> str:
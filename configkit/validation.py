@@ -0,0 +1,697 @@
+"""
+Pluggable validator backends.
+
+A backend turns a :class:`~configkit.schema.Schema` into a validator:
+an object with ``validate``, ``iter_errors`` and ``is_valid`` methods
+that behave like those of :class:`jsonschema.Draft7Validator`.
+
+:class:`JsonSchemaBackend`, the default, uses ``jsonschema`` as is.
+:class:`CompiledBackend` generates Python source for each schema,
+``$ref``'d schemas included, with one specialized function per
+subschema, so that checking an instance does not have to interpret the
+schema again every time. When an instance turns out to be invalid, it
+is handed to ``jsonschema`` to build the same
+:class:`~jsonschema.ValidationError` it would have raised on its own.
+Keywords the compiler does not know are left to ``jsonschema`` too.
+
+Validators resolve ``$ref`` s with a :class:`DirectoryResolver`.
+``jsonschema`` is imported along with this module, the first time a
+directory needs a validator.
+"""
+
+from . import directory, schema
+from abc import ABC, abstractmethod
+from fractions import Fraction
+from jsonschema import Draft7Validator, RefResolver
+
+# Private, but they are the very comparisons the fallback makes in the
+# installed version; pyproject.toml keeps jsonschema to versions with them.
+from jsonschema._utils import equal, unbool, uniq
+from jsonschema.exceptions import RefResolutionError
+from numbers import Number
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import urljoin
+import re
+import threading
+
+
+class IValidator(ABC):
+    """ABC for the validators that backends build."""
+
+    @abstractmethod
+    def validate(self, instance: Any) -> None:
+        """Raise a :class:`~jsonschema.ValidationError` if ``instance`` is invalid."""
+
+    @abstractmethod
+    def iter_errors(self, instance: Any) -> Iterator[Exception]:
+        """Yield the :class:`~jsonschema.ValidationError` s of ``instance``."""
+
+    @abstractmethod
+    def is_valid(self, instance: Any) -> bool:
+        """Return whether ``instance`` is valid."""
+
+
+IValidator.register(Draft7Validator)
+
+
+class IValidatorBackend(ABC):
+    """ABC that builds validators for schemas."""
+
+    @abstractmethod
+    def build(self, sch: "schema.Schema") -> IValidator:
+        """Return a validator for ``sch`` that resolves ``$ref`` s in its directory."""
+
+
+class JsonSchemaBackend(IValidatorBackend):
+    """Validate with :class:`jsonschema.Draft7Validator`."""
+
+    def __repr__(self) -> str:
+        return "JsonSchemaBackend()"
+
+    def build(self, sch: "schema.Schema") -> Draft7Validator:
+        definition = sch.definition
+        return Draft7Validator(
+            definition, resolver=sch.directory.resolver(sch.id, definition)
+        )
+
+
+class CompiledBackend(IValidatorBackend):
+    """
+    Validate with code generated for each schema.
+
+    ``fallback`` builds the validator used to report errors and to check
+    subschemas that can't be compiled.
+    """
+
+    def __init__(self, fallback: Optional[IValidatorBackend] = None):
+        self.fallback = JsonSchemaBackend() if fallback is None else fallback
+
+    def __repr__(self) -> str:
+        return "CompiledBackend(fallback={!r})".format(self.fallback)
+
+    def build(self, sch: "schema.Schema") -> "CompiledValidator":
+        fallback = self.fallback.build(sch)
+        return compile_validator(fallback, sch.id)
+
+
+class CompiledValidator(IValidator):
+    """
+    A validator made of generated functions.
+
+    Valid instances never reach ``fallback``; invalid ones are checked
+    again by it, so errors are exactly those ``fallback`` reports.
+    """
+
+    def __init__(self, check: Callable[[Any], bool], fallback, source: str):
+        self._check = check
+        self.fallback = fallback
+        self.source = source
+
+    def __repr__(self) -> str:
+        return "CompiledValidator(fallback={!r})".format(self.fallback)
+
+    @property
+    def schema(self) -> Any:
+        return self.fallback.schema
+
+    @property
+    def resolver(self):
+        return self.fallback.resolver
+
+    def validate(self, instance: Any) -> None:
+        if not self._check(instance):
+            self.fallback.validate(instance)
+
+    def iter_errors(self, instance: Any) -> Iterator[Exception]:
+        if self._check(instance):
+            return iter(())
+        return self.fallback.iter_errors(instance)
+
+    def is_valid(self, instance: Any) -> bool:
+        return self._check(instance)
+
+
+def compile_validator(fallback, base_uri: Optional[str] = None) -> CompiledValidator:
+    """Compile the schema of a ``jsonschema`` validator, which it falls back on."""
+    compiler = _Compiler(fallback)
+    root = compiler.function(fallback.schema, fallback.resolver.resolution_scope)
+    source = "# Generated from {}\n\n{}\n".format(
+        base_uri or "<anonymous schema>", "\n\n".join(compiler.functions)
+    )
+    code = compile(source, "<configkit: {}>".format(base_uri), "exec")
+    exec(code, compiler.namespace)
+    return CompiledValidator(compiler.namespace[root], fallback, source)
+
+
+#: Python expressions, with ``{0}`` for the instance, that check each JSON type.
+TYPE_CHECKS = {
+    "array": "isinstance({0}, list)",
+    "boolean": "isinstance({0}, bool)",
+    "integer": "(isinstance({0}, int) and not isinstance({0}, bool)"
+    " or isinstance({0}, float) and {0}.is_integer())",
+    "null": "{0} is None",
+    "number": "(isinstance({0}, Number) and not isinstance({0}, bool))",
+    "object": "isinstance({0}, dict)",
+    "string": "isinstance({0}, str)",
+}
+
+_NUMERIC = ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum", "multipleOf")
+_STRING = ("minLength", "maxLength", "pattern")
+_ARRAY = ("minItems", "maxItems", "uniqueItems", "items", "additionalItems", "contains")
+_OBJECT = (
+    "required",
+    "minProperties",
+    "maxProperties",
+    "properties",
+    "patternProperties",
+    "additionalProperties",
+    "dependencies",
+    "propertyNames",
+)
+_OTHER = ("type", "enum", "const", "allOf", "anyOf", "oneOf", "not", "if", "format")
+COMPILED_KEYWORDS = frozenset(
+    ("$ref",) + _NUMERIC + _STRING + _ARRAY + _OBJECT + _OTHER
+)
+
+_IMPLIES = {
+    "number": {"number", "integer"},
+    "string": {"string"},
+    "array": {"array"},
+    "object": {"object"},
+}
+
+# Deeper subschemas become functions of their own, well within the
+# interpreter's limits on nested blocks.
+_MAX_INLINE_DEPTH = 12
+
+
+def _in_enum(instance: Any, enums: List[Any]) -> bool:
+    # The comparison jsonschema's enum keyword makes.
+    if instance == 0 or instance == 1:
+        unbooled = unbool(instance)
+        return any(unbooled == unbool(each) for each in enums)
+    return instance in enums
+
+
+def _not_multiple(instance: Any, dB: Any) -> Any:
+    # The comparison jsonschema's multipleOf keyword makes.
+    if isinstance(dB, float):
+        quotient = instance / dB
+        try:
+            return int(quotient) != quotient
+        except OverflowError:
+            return (Fraction(instance) / Fraction(dB)).denominator != 1
+    return instance % dB
+
+
+def _fail_if(lines: List[str], pad: str, condition: str) -> List[str]:
+    lines.append("{}if {}:".format(pad, condition))
+    lines.append("{}    return False".format(pad))
+    return lines
+
+
+def _types(subschema: dict) -> List[str]:
+    types = subschema.get("type", [])
+    return types if isinstance(types, list) else [types]
+
+
+def _exactly_one(instance: Any, checks: tuple) -> bool:
+    found = False
+    for check in checks:
+        if check(instance):
+            if found:
+                return False
+            found = True
+    return found
+
+
+class _Compiler:
+    def __init__(self, validator):
+        self.validator = validator
+        self.resolver = validator.resolver
+        self.functions: List[str] = []
+        self.refs: Dict[str, str] = {}
+        self.count = 0
+        self.namespace: Dict[str, Any] = {
+            "Number": Number,
+            "equal": equal,
+            "uniq": uniq,
+            "in_enum": _in_enum,
+            "not_multiple": _not_multiple,
+            "exactly_one": _exactly_one,
+            "fallback": self.fallback,
+            "always": lambda instance: True,
+            "never": lambda instance: False,
+        }
+        unsupported = set(validator.VALIDATORS) - COMPILED_KEYWORDS
+        if validator.format_checker is not None:
+            unsupported.add("format")
+        self.unsupported = frozenset(unsupported)
+
+    def fallback(self, instance: Any, subschema: Any, scope: str) -> bool:
+        resolver = self.resolver
+        resolver.push_scope(scope)
+        # Built from scratch, as jsonschema 3 has no ``evolve``.
+        validator = type(self.validator)(
+            subschema,
+            resolver=resolver,
+            format_checker=self.validator.format_checker,
+        )
+        try:
+            return validator.is_valid(instance)
+        finally:
+            resolver.pop_scope()
+
+    def name(self, prefix: str) -> str:
+        self.count += 1
+        return "{}{}".format(prefix, self.count)
+
+    def constant(self, value: Any) -> str:
+        if type(value) in (int, str):
+            return repr(value)
+        name = self.name("c")
+        self.namespace[name] = value
+        return name
+
+    def function(self, subschema: Any, scope: str, name: Optional[str] = None) -> str:
+        """Compile a subschema into a function and return the function's name."""
+        if subschema is True:
+            return "always"
+        if subschema is False:
+            return "never"
+        name = name or self.name("v")
+        lines = self.block(subschema, "x", scope, 1)
+        self.functions.append(
+            "def {}(x):\n{}\n    return True".format(name, "\n".join(lines))
+        )
+        return name
+
+    def ref(self, ref: str, scope: str) -> Optional[str]:
+        resolver = self.resolver
+        resolver.push_scope(scope)
+        try:
+            url, resolved = resolver.resolve(ref)
+        except RefResolutionError:
+            # Let jsonschema raise this if the reference is ever followed.
+            return None
+        finally:
+            resolver.pop_scope()
+
+        if url not in self.refs:
+            self.refs[url] = self.name("r")
+            self.function(resolved, url, self.refs[url])
+        return self.refs[url]
+
+    def block(self, subschema: Any, var: str, scope: str, depth: int) -> List[str]:
+        """Return lines that ``return False`` if ``var`` is not valid."""
+        pad = "    " * depth
+        if isinstance(subschema, bool):
+            return [] if subschema else [pad + "return False"]
+        if depth > _MAX_INLINE_DEPTH:
+            call = "not {}({})".format(self.function(subschema, scope), var)
+            return _fail_if([], pad, call)
+        if "$ref" in subschema:
+            return self.ref_block(subschema["$ref"], var, scope, pad)
+
+        if subschema.get("$id"):
+            scope = urljoin(scope, subschema["$id"])
+        if not self.compilable(subschema):
+            return self.fallback_block(subschema, var, scope, pad)
+
+        lines: List[str] = []
+        for group in (self.generic, self.typed, self.combined, self.conditional):
+            lines.extend(group(subschema, var, scope, depth))
+        return lines
+
+    def compilable(self, subschema: dict) -> bool:
+        """Return whether every keyword of ``subschema`` can be compiled."""
+        return not (
+            self.unsupported.intersection(subschema)
+            or any(kind not in TYPE_CHECKS for kind in _types(subschema))
+            or (
+                "additionalItems" in subschema
+                and isinstance(subschema.get("items", {}), bool)
+            )
+        )
+
+    def ref_block(self, ref: str, var: str, scope: str, pad: str) -> List[str]:
+        target = self.ref(ref, scope)
+        if target is None:
+            return self.fallback_block({"$ref": ref}, var, scope, pad)
+        return _fail_if([], pad, "not {}({})".format(target, var))
+
+    def fallback_block(
+        self, subschema: Any, var: str, scope: str, pad: str
+    ) -> List[str]:
+        call = "not fallback({}, {}, {})".format(
+            var, self.constant(subschema), self.constant(scope)
+        )
+        return _fail_if([], pad, call)
+
+    def generic(self, subschema: dict, var: str, scope: str, depth: int) -> List[str]:
+        lines: List[str] = []
+        pad = "    " * depth
+
+        if "type" in subschema:
+            types = _types(subschema)
+            checks = " or ".join(TYPE_CHECKS[kind].format(var) for kind in types)
+            _fail_if(lines, pad, "not ({})".format(checks))
+
+        if "enum" in subschema:
+            enums = subschema["enum"]
+            if all(isinstance(each, str) for each in enums):
+                condition = "not (isinstance({0}, str) and {0} in {1})".format(
+                    var, self.constant(frozenset(enums))
+                )
+            else:
+                condition = "not in_enum({}, {})".format(var, self.constant(enums))
+            _fail_if(lines, pad, condition)
+
+        if "const" in subschema:
+            const = self.constant(subschema["const"])
+            _fail_if(lines, pad, "not equal({}, {})".format(var, const))
+        return lines
+
+    def typed(self, subschema: dict, var: str, scope: str, depth: int) -> List[str]:
+        # Keywords for one type of instance only apply to that type; the
+        # check for it is left out when "type" already made sure of it.
+        lines: List[str] = []
+        pad = "    " * depth
+        types = set(_types(subschema))
+
+        for kind, build in [
+            ("number", self.number),
+            ("string", self.string),
+            ("array", self.array),
+            ("object", self.object),
+        ]:
+            if types and types <= _IMPLIES[kind]:
+                lines.extend(build(subschema, var, scope, depth))
+                continue
+            body = build(subschema, var, scope, depth + 1)
+            if body:
+                lines.append("{}if {}:".format(pad, TYPE_CHECKS[kind].format(var)))
+                lines.extend(body)
+        return lines
+
+    def combined(self, subschema: dict, var: str, scope: str, depth: int) -> List[str]:
+        lines: List[str] = []
+        pad = "    " * depth
+
+        for each in subschema.get("allOf", ()):
+            lines.extend(self.block(each, var, scope, depth))
+
+        if "anyOf" in subschema:
+            calls = " or ".join(
+                "{}({})".format(self.function(each, scope), var)
+                for each in subschema["anyOf"]
+            )
+            _fail_if(lines, pad, "not ({})".format(calls))
+
+        if "oneOf" in subschema:
+            checks = ", ".join(
+                self.function(each, scope) for each in subschema["oneOf"]
+            )
+            _fail_if(lines, pad, "not exactly_one({}, ({},))".format(var, checks))
+
+        if "not" in subschema:
+            check = self.function(subschema["not"], scope)
+            _fail_if(lines, pad, "{}({})".format(check, var))
+        return lines
+
+    def conditional(
+        self, subschema: dict, var: str, scope: str, depth: int
+    ) -> List[str]:
+        lines: List[str] = []
+        pad = "    " * depth
+        if "if" not in subschema:
+            return lines
+
+        then = self.block(subschema.get("then", True), var, scope, depth + 1)
+        else_ = self.block(subschema.get("else", True), var, scope, depth + 1)
+        if then or else_:
+            check = self.function(subschema["if"], scope)
+            lines.append("{}if {}({}):".format(pad, check, var))
+            lines.extend(then or [pad + "    pass"])
+            if else_:
+                lines.append(pad + "else:")
+                lines.extend(else_)
+        return lines
+
+    def number(self, subschema: dict, var: str, scope: str, depth: int) -> List[str]:
+        lines: List[str] = []
+        pad = "    " * depth
+        for keyword, failure in [
+            ("minimum", "{} < {}"),
+            ("maximum", "{} > {}"),
+            ("exclusiveMinimum", "{} <= {}"),
+            ("exclusiveMaximum", "{} >= {}"),
+            ("multipleOf", "not_multiple({}, {})"),
+        ]:
+            if keyword in subschema:
+                limit = self.constant(subschema[keyword])
+                _fail_if(lines, pad, failure.format(var, limit))
+        return lines
+
+    def string(self, subschema: dict, var: str, scope: str, depth: int) -> List[str]:
+        lines: List[str] = []
+        pad = "    " * depth
+        if "minLength" in subschema:
+            limit = self.constant(subschema["minLength"])
+            _fail_if(lines, pad, "len({}) < {}".format(var, limit))
+        if "maxLength" in subschema:
+            limit = self.constant(subschema["maxLength"])
+            _fail_if(lines, pad, "len({}) > {}".format(var, limit))
+        if "pattern" in subschema:
+            search = self.constant(re.compile(subschema["pattern"]).search)
+            _fail_if(lines, pad, "not {}({})".format(search, var))
+        return lines
+
+    def array(self, subschema: dict, var: str, scope: str, depth: int) -> List[str]:
+        lines: List[str] = []
+        pad = "    " * depth
+
+        if "minItems" in subschema:
+            limit = self.constant(subschema["minItems"])
+            _fail_if(lines, pad, "len({}) < {}".format(var, limit))
+        if "maxItems" in subschema:
+            limit = self.constant(subschema["maxItems"])
+            _fail_if(lines, pad, "len({}) > {}".format(var, limit))
+        if subschema.get("uniqueItems"):
+            _fail_if(lines, pad, "not uniq({})".format(var))
+
+        lines.extend(self.items(subschema, var, scope, depth))
+
+        if "contains" in subschema:
+            item = self.name("y")
+            check = self.function(subschema["contains"], scope)
+            condition = "not any({0}({1}) for {1} in {2})".format(check, item, var)
+            _fail_if(lines, pad, condition)
+        return lines
+
+    def items(self, subschema: dict, var: str, scope: str, depth: int) -> List[str]:
+        lines: List[str] = []
+        pad = "    " * depth
+        items = subschema.get("items", True)
+
+        if isinstance(items, list):
+            return self.tuple_items(subschema, var, scope, depth)
+        if items is False:
+            return _fail_if(lines, pad, var)
+
+        item = self.name("y")
+        body = self.block(items, item, scope, depth + 1)
+        if body:
+            lines.append("{}for {} in {}:".format(pad, item, var))
+            lines.extend(body)
+        return lines
+
+    def tuple_items(
+        self, subschema: dict, var: str, scope: str, depth: int
+    ) -> List[str]:
+        lines: List[str] = []
+        pad = "    " * depth
+        items = subschema["items"]
+
+        for index, each in enumerate(items):
+            item = self.name("y")
+            body = self.block(each, item, scope, depth + 1)
+            if body:
+                lines.append("{}if len({}) > {}:".format(pad, var, index))
+                lines.append("{}    {} = {}[{}]".format(pad, item, var, index))
+                lines.extend(body)
+
+        extra = subschema.get("additionalItems", True)
+        if extra is False:
+            _fail_if(lines, pad, "len({}) > {}".format(var, len(items)))
+        elif isinstance(extra, dict):
+            item = self.name("y")
+            body = self.block(extra, item, scope, depth + 1)
+            if body:
+                lines.append("{}for {} in {}[{}:]:".format(pad, item, var, len(items)))
+                lines.extend(body)
+        return lines
+
+    def object(self, subschema: dict, var: str, scope: str, depth: int) -> List[str]:
+        lines: List[str] = []
+        pad = "    " * depth
+
+        for name in subschema.get("required", ()):
+            _fail_if(lines, pad, "{} not in {}".format(self.constant(name), var))
+        if "minProperties" in subschema:
+            limit = self.constant(subschema["minProperties"])
+            _fail_if(lines, pad, "len({}) < {}".format(var, limit))
+        if "maxProperties" in subschema:
+            limit = self.constant(subschema["maxProperties"])
+            _fail_if(lines, pad, "len({}) > {}".format(var, limit))
+
+        for group in (
+            self.properties,
+            self.additional_properties,
+            self.dependencies,
+            self.property_names,
+        ):
+            lines.extend(group(subschema, var, scope, depth))
+        return lines
+
+    def properties(
+        self, subschema: dict, var: str, scope: str, depth: int
+    ) -> List[str]:
+        lines: List[str] = []
+        pad = "    " * depth
+
+        for name, each in subschema.get("properties", {}).items():
+            value = self.name("y")
+            body = self.block(each, value, scope, depth + 1)
+            if body:
+                lines.append("{}if {} in {}:".format(pad, self.constant(name), var))
+                lines.append(
+                    "{}    {} = {}[{}]".format(pad, value, var, self.constant(name))
+                )
+                lines.extend(body)
+
+        for pattern, each in subschema.get("patternProperties", {}).items():
+            key, value = self.name("k"), self.name("y")
+            body = self.block(each, value, scope, depth + 2)
+            if body:
+                search = self.constant(re.compile(pattern).search)
+                lines.append(
+                    "{}for {}, {} in {}.items():".format(pad, key, value, var)
+                )
+                lines.append("{}    if {}({}):".format(pad, search, key))
+                lines.extend(body)
+        return lines
+
+    def additional_properties(
+        self, subschema: dict, var: str, scope: str, depth: int
+    ) -> List[str]:
+        lines: List[str] = []
+        pad = "    " * depth
+        extra = subschema.get("additionalProperties", True)
+        if extra is True:
+            return lines
+
+        key, value = self.name("k"), self.name("y")
+        known = self.constant(frozenset(subschema.get("properties", {})))
+        condition = "{} not in {}".format(key, known)
+        patterns = subschema.get("patternProperties", {})
+        if patterns:
+            search = self.constant(re.compile("|".join(patterns)).search)
+            condition += " and not {}({})".format(search, key)
+
+        if isinstance(extra, dict):
+            body = self.block(extra, value, scope, depth + 2)
+            if body:
+                lines.append("{}for {}, {} in {}.items():".format(pad, key, value, var))
+                lines.append("{}    if {}:".format(pad, condition))
+                lines.extend(body)
+        elif not extra:
+            lines.append("{}for {} in {}:".format(pad, key, var))
+            lines.append("{}    if {}:".format(pad, condition))
+            lines.append("{}        return False".format(pad))
+        return lines
+
+    def dependencies(
+        self, subschema: dict, var: str, scope: str, depth: int
+    ) -> List[str]:
+        lines: List[str] = []
+        pad = "    " * depth
+
+        for name, each in subschema.get("dependencies", {}).items():
+            if isinstance(each, list):
+                body: List[str] = []
+                for required in each:
+                    condition = "{} not in {}".format(self.constant(required), var)
+                    _fail_if(body, pad + "    ", condition)
+            else:
+                body = self.block(each, var, scope, depth + 1)
+            if body:
+                lines.append("{}if {} in {}:".format(pad, self.constant(name), var))
+                lines.extend(body)
+        return lines
+
+    def property_names(
+        self, subschema: dict, var: str, scope: str, depth: int
+    ) -> List[str]:
+        lines: List[str] = []
+        pad = "    " * depth
+        if "propertyNames" in subschema:
+            key = self.name("k")
+            body = self.block(subschema["propertyNames"], key, scope, depth + 1)
+            if body:
+                lines.append("{}for {} in {}:".format(pad, key, var))
+                lines.extend(body)
+        return lines
+
+
+class DirectoryResolver(RefResolver):
+    """Resolve remote references against a directory's ``$id`` index."""
+
+    def __init__(self, directory: "directory.Directory", base_uri: str, referrer: object):
+        self._root_scope = base_uri
+        self._local = threading.local()
+        super().__init__(base_uri, referrer)
+        self.directory = directory
+
+    # Resolution scopes are pushed and popped while validating, so keep
+    # them per thread to let one validator be shared between threads.
+    @property
+    def _scopes_stack(self) -> List[str]:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = [self._root_scope]
+            return self._local.stack
+
+    @_scopes_stack.setter
+    def _scopes_stack(self, stack: List[str]):
+        self._local.stack = stack
+
+    def resolve(self, ref: str):
+        self.directory.counters.incr("refs_resolved")
+        with self.directory.instrument("resolve", ref=ref):
+            return super().resolve(ref)
+
+    def resolve_remote(self, uri):
+        sch = self.directory.by_id(uri)
+        if sch is not None:
+            return sch.definition
+
+        remote = self.directory._remote
+        if uri not in remote:
+            remote[uri] = super().resolve_remote(uri)
+        return remote[uri]
+
+
+default_backend = JsonSchemaBackend()
+
+__all__ = [
+    "IValidator",
+    "IValidatorBackend",
+    "JsonSchemaBackend",
+    "CompiledBackend",
+    "CompiledValidator",
+    "compile_validator",
+    "DirectoryResolver",
+    "default_backend",
+]
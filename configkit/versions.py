@@ -1,17 +1,29 @@
 from collections.abc import Sequence
-from typing import Any, Callable, List, Optional
-
-from packaging.specifiers import SpecifierSet
-from packaging.version import parse
+from functools import lru_cache
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Callable, Iterator, List, Optional, Tuple
 
 from . import schema
 
+if TYPE_CHECKING:
+    from packaging.specifiers import SpecifierSet
+
 SortKey = Callable[['schema.Schema'], Any]
 
 
 class Versions(Sequence):
+    """
+    The versions of one schema, in the order they were found.
+
+    Version strings are parsed at most once per instance, and the
+    :func:`version_sort_key` ordering is computed once and reused by
+    :meth:`newest`, :meth:`oldest` and :meth:`version`.
+    """
+
     def __init__(self, versions: List['schema.Schema']):
         self.versions = versions
+        self._keys = None
+        self._ascending = None
 
     def __len__(self) -> int:
         return len(self.versions)
@@ -20,18 +32,13 @@ class Versions(Sequence):
         return self.versions[idx]
 
     def sorted(self, key: SortKey, reverse=False) -> 'Versions':
+        if key is version_sort_key:
+            return Versions([sch for _, sch in self._by_version(reverse)])
         return Versions(sorted(self, key=key, reverse=reverse))
 
     def filtered(self, specifier: str, match_unversioned=True) -> 'Versions':
-        acceptable_versions = SpecifierSet(specifier)
-
-        def matches_requirements(sch):
-            if not sch.version:
-                return match_unversioned
-            else:
-                version = parse(sch.version)
-                return version in acceptable_versions
-        return Versions([sch for sch in self.versions if matches_requirements(sch)])
+        return Versions([sch for _, sch in self._matching(
+            zip(self._sort_keys(), self.versions), specifier, match_unversioned)])
 
     def version(self, specifier: str, sort_key: Optional[SortKey] = None, reverse=False, match_unversioned=True) -> Optional['schema.Schema']:
         """Return the first schema that matches the version spec
@@ -44,11 +51,16 @@ class Versions(Sequence):
         :param match_unversioned: unless true, unversioned schemas
                                   will not count as matches
         """
-        versions = self.filtered(specifier, match_unversioned)
-        try:
-            return next(iter(versions if sort_key is None else versions.sorted(sort_key, reverse)))
-        except StopIteration:
-            return None
+        if sort_key is None:
+            candidates = zip(self._sort_keys(), self.versions)
+        elif sort_key is version_sort_key:
+            candidates = self._by_version(reverse)
+        else:
+            candidates = ((None, sch) for sch in self.sorted(sort_key, reverse))
+
+        for _, sch in self._matching(candidates, specifier, match_unversioned):
+            return sch
+        return None
 
     def newest(self, specifier: str = ">=0", match_unversioned=True) -> Optional['schema.Schema']:
         return self.version(specifier, version_sort_key, reverse=True, match_unversioned=match_unversioned)
@@ -56,6 +68,60 @@ class Versions(Sequence):
     def oldest(self, specifier: str = ">=0", match_unversioned=True) -> Optional['schema.Schema']:
         return self.version(specifier, version_sort_key, match_unversioned=match_unversioned)
 
+    def _sort_keys(self) -> List[Any]:
+        if self._keys is None:
+            self._keys = [version_sort_key(sch) for sch in self.versions]
+        return self._keys
+
+    def _by_version(self, reverse=False) -> Iterator[Tuple[Any, 'schema.Schema']]:
+        """Iterate (key, schema) pairs as a stable sort by version would."""
+        if self._ascending is None:
+            self._ascending = sorted(
+                zip(self._sort_keys(), self.versions), key=itemgetter(0))
+
+        ascending = self._ascending
+        if not reverse:
+            yield from ascending
+            return
+
+        # Walk from the right, keeping equal versions in their found order
+        end = len(ascending)
+        while end > 0:
+            start = end - 1
+            while start > 0 and ascending[start - 1][0] == ascending[end - 1][0]:
+                start -= 1
+            yield from ascending[start:end]
+            end = start
+
+    @staticmethod
+    def _matching(candidates, specifier: str, match_unversioned: bool):
+        acceptable_versions = specifier_set(specifier)
+
+        for key, sch in candidates:
+            if not sch.version:
+                if match_unversioned:
+                    yield key, sch
+            elif (key if key is not None else parse_version(sch.version)) in acceptable_versions:
+                yield key, sch
+
+
+@lru_cache(maxsize=256)
+def specifier_set(specifier: str) -> 'SpecifierSet':
+    """Return a (shared) :class:`SpecifierSet` for a specifier string."""
+    from packaging.specifiers import SpecifierSet
+    return SpecifierSet(specifier)
+
+
+@lru_cache(maxsize=4096)
+def parse_version(version: str) -> Any:
+    return parse(version)
+
+
+def parse(version: str) -> Any:
+    """:func:`packaging.version.parse`, imported the first time it is needed."""
+    from packaging.version import parse
+    return parse(version)
+
 
 def version_sort_key(sch: 'schema.Schema') -> Any:
-    return parse('9999999.9999999' if sch.version is None else sch.version)
+    return parse_version('9999999.9999999' if sch.version is None else sch.version)
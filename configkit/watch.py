@@ -0,0 +1,186 @@
+"""
+Keep a schema directory and the config files validated against it fresh.
+
+A :class:`ConfigWatcher` refreshes its directory's index and reloads
+registered config files whenever they, or the schemas they are validated
+against, change. It uses inotify (through ``inotify_simple``, installed
+with the ``inotify`` extra) to wake up as soon as something changes, and
+falls back to polling the stat signatures every ``interval`` seconds.
+"""
+
+from . import directory, schema
+from typing import Callable, Dict, List, Optional
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[["schema.LoadResult"], None]
+
+
+class _Watch:
+    __slots__ = ("path", "name", "version_spec", "use", "encoding", "callbacks", "state")
+
+    def __init__(self, path, name, version_spec, use, encoding):
+        self.path = path
+        self.name = name
+        self.version_spec = version_spec
+        self.use = use
+        self.encoding = encoding
+        self.callbacks: List[Callback] = []
+        self.state = None
+
+
+class ConfigWatcher:
+    def __init__(self, dir_: "directory.Directory", interval: float = 1.0):
+        self.directory = dir_
+        self.interval = interval
+        self._watches: Dict[str, _Watch] = {}
+        self._lock = threading.RLock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __repr__(self) -> str:
+        return "ConfigWatcher(directory={!r})".format(self.directory)
+
+    def register(
+        self,
+        path: str,
+        name: str,
+        version_spec: Optional[str] = None,
+        callback: Optional[Callback] = None,
+        use=None,
+        encoding="utf-8",
+    ) -> "schema.LoadResult":
+        """
+        Start watching a config file and return the result of loading it.
+
+        The file is validated against the newest version of ``name``
+        matching ``version_spec``. Whenever the file or that schema
+        changes, it is reloaded and ``callback`` is called with the
+        new :class:`~configkit.schema.LoadResult`.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            watch = self._watches.get(path)
+            if watch is None:
+                watch = self._watches[path] = _Watch(
+                    path, name, version_spec, use, encoding
+                )
+            if callback is not None:
+                watch.callbacks.append(callback)
+            return self._load(watch)
+
+    def unregister(self, path: str):
+        with self._lock:
+            self._watches.pop(os.path.abspath(path), None)
+
+    def poll(self) -> List["schema.LoadResult"]:
+        """Check for changes once, notify subscribers and return the reloads."""
+        with self._lock:
+            self.directory.refresh()
+            reloaded = []
+
+            for watch in list(self._watches.values()):
+                if self._state(watch) != watch.state:
+                    result = self._load(watch)
+                    reloaded.append(result)
+                    for callback in watch.callbacks:
+                        try:
+                            callback(result)
+                        except Exception:
+                            logger.exception("Error in callback for %s", watch.path)
+
+            return reloaded
+
+    def start(self):
+        """Watch for changes in a background thread."""
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=repr(self), daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "ConfigWatcher":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _state(self, watch: _Watch) -> tuple:
+        # The file's stat signature, the schema it is validated against and
+        # that schema's validator, which is rebuilt when a $ref'd schema changes.
+        try:
+            sig = directory.signature(os.stat(watch.path))
+        except OSError:
+            sig = None
+
+        vers = self.directory.get(watch.name)
+        sch = None if vers is None else vers.newest(watch.version_spec or ">=0")
+        try:
+            validator = None if sch is None else sch.validator
+        except Exception:
+            validator = None
+        return sig, sch, validator
+
+    def _load(self, watch: _Watch) -> "schema.LoadResult":
+        watch.state = state = self._state(watch)
+        sch = state[1]
+        if sch is None:
+            error = LookupError(
+                "No schema {!r} matching {!r}".format(watch.name, watch.version_spec)
+            )
+            return schema.LoadResult(watch.path, None, error)
+
+        instance, error = schema.attempt(
+            lambda path: sch.load(path, watch.use, watch.encoding), watch.path
+        )
+        return schema.LoadResult(watch.path, instance, error)
+
+    def _run(self):
+        try:
+            from inotify_simple import INotify, flags
+        except ImportError:
+            while not self._stopping.wait(self.interval):
+                self._poll_safely()
+            return
+
+        mask = (
+            flags.CREATE
+            | flags.DELETE
+            | flags.MODIFY
+            | flags.CLOSE_WRITE
+            | flags.MOVED_FROM
+            | flags.MOVED_TO
+            | flags.ATTRIB
+        )
+        with INotify() as inotify:
+            while not self._stopping.is_set():
+                with self._lock:
+                    watched = set(self.directory._dirs)
+                    watched.update(os.path.dirname(p) for p in self._watches)
+                for path in watched:
+                    try:
+                        inotify.add_watch(path, mask)
+                    except OSError:
+                        pass
+                # Wake up on any event, but also re-stat every interval in
+                # case something changed where no watch was set up yet.
+                inotify.read(timeout=int(self.interval * 1000))
+                if not self._stopping.is_set():
+                    self._poll_safely()
+
+    def _poll_safely(self):
+        try:
+            self.poll()
+        except Exception:
+            logger.exception("Error while polling %r", self.directory)
@@ -0,0 +1,34 @@
+import json
+import shutil
+import pytest
+from pathlib import PurePath
+from configkit import SchemaDirectory
+from configkit.matchers import RegexMatcher
+
+SCHEMAS = str(PurePath(__file__).with_name("schemas"))
+PATTERN = r"(?P<name>[^/\\]+?)-(?P<version>[^/\\]+?).json$"
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "schemas")
+    shutil.copytree(SCHEMAS, path)
+    return path
+
+
+@pytest.fixture
+def matcher():
+    return RegexMatcher(PATTERN)
+
+
+@pytest.fixture
+def schema_directory():
+    return SchemaDirectory(SCHEMAS, RegexMatcher(PATTERN))
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "config.json"
+    credentials = {"client_id": "a", "secret_key": "b"}
+    path.write_text(json.dumps({"resources": ["x"], "credentials": credentials}))
+    return str(path)
@@ -0,0 +1,88 @@
+import os
+import shutil
+import pytest
+from pathlib import Path, PurePath
+from configkit import SchemaDirectory, ValidationError
+from configkit.bundle import BundleDirectory
+from configkit.matchers import RegexMatcher
+from jsonschema import Draft7Validator
+
+
+@pytest.fixture
+def bundle_path(path, matcher, tmp_path):
+    bundle_path = str(tmp_path / "schemas.bundle")
+    SchemaDirectory(path, matcher).save_bundle(bundle_path)
+    shutil.rmtree(path)
+    return bundle_path
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_bundle_round_trip(bundle_path, mmap, mocker):
+    expected = SchemaDirectory(
+        str(PurePath(__file__).with_name("schemas")),
+        RegexMatcher(r"(?P<name>[^/\\]+?)-(?P<version>[^/\\]+?).json$"),
+    )
+    len(expected)
+    mocker.spy(os, "scandir")
+    mocker.spy(Draft7Validator, "check_schema")
+
+    directory = SchemaDirectory.from_bundle(bundle_path, mmap=mmap)
+    assert isinstance(directory, BundleDirectory)
+    assert sorted(directory) == sorted(expected)
+    for name in expected:
+        assert describe(directory[name]) == describe(expected[name])
+
+    config = directory["config"].version("==1.0")
+    credentials = {"client_id": "a", "secret_key": "b"}
+    assert config.validate({"resources": ["x"], "credentials": credentials})
+    with pytest.raises(ValidationError):
+        config.validate({"resources": ["x"], "credentials": {"client_id": "a"}})
+
+    assert os.scandir.call_count == 0
+    assert Draft7Validator.check_schema.call_count == 0
+
+
+def describe(vers):
+    return [(sch.version, sch.id, sch.definition) for sch in vers]
+
+
+def test_bundle_parses_schemas_when_used(bundle_path):
+    directory = SchemaDirectory.from_bundle(bundle_path)
+    directory["credentials"].newest().definition
+
+    assert directory.stats()["files_parsed"] == 1
+
+
+def test_bundle_never_changes(bundle_path):
+    directory = SchemaDirectory.from_bundle(bundle_path)
+    names = sorted(directory)
+
+    directory.invalidate()
+    assert directory.refresh() == 1
+    assert sorted(directory) == names
+
+
+def test_invalid_schemas_are_left_out(path, matcher, tmp_path):
+    Path(path, "broken-1.0.json").write_text('{"type": 5}')
+    bundle_path = str(tmp_path / "schemas.bundle")
+    SchemaDirectory(path, matcher, lazy=True).save_bundle(bundle_path)
+
+    assert "broken" not in SchemaDirectory.from_bundle(bundle_path)
+
+
+def test_unparseable_schemas_are_left_out(path, matcher, tmp_path):
+    Path(path, "broken-1.0.json").write_text('{"type": ')
+    bundle_path = str(tmp_path / "schemas.bundle")
+    SchemaDirectory(path, matcher, lazy=True).save_bundle(bundle_path)
+
+    directory = SchemaDirectory.from_bundle(bundle_path)
+    assert "broken" not in directory
+    assert len(directory["config"].versions) == 3
+
+
+def test_not_a_bundle(tmp_path):
+    path = tmp_path / "schemas.bundle"
+    path.write_text("{}")
+
+    with pytest.raises(ValueError):
+        SchemaDirectory.from_bundle(str(path))
@@ -0,0 +1,55 @@
+from configkit.cache import LoadCache
+
+
+def test_lru_eviction():
+    cache = LoadCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_byte_bound():
+    cache = LoadCache(maxsize=None, maxbytes=10)
+    cache.put("a", 1, 4)
+    cache.put("b", 2, 4)
+    cache.put("c", 3, 4)
+
+    assert cache.get("a") is None
+    assert cache.size == 8
+
+    cache.put("huge", 4, 11)
+    assert cache.get("huge") is None
+    assert cache.size == 8
+
+
+def test_replacing_entry_updates_size():
+    cache = LoadCache(maxbytes=10)
+    cache.put("a", 1, 6)
+    cache.put("a", 2, 3)
+
+    assert cache.size == 3
+    assert cache.get("a") == 2
+
+
+def test_hits_and_misses():
+    cache = LoadCache()
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_clear():
+    cache = LoadCache()
+    cache.put("a", 1, 5)
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.size == 0
@@ -1,4 +1,8 @@
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pytest
+import os
 import shutil
 from pathlib import PurePath, Path
 from configkit import SchemaDirectory
@@ -8,7 +12,10 @@ from configkit.matchers import (
     RegexMatcher,
 )
 from configkit.versions import Versions
+from configkit import pool
+from configkit.frozen import FrozenDict
 from configkit.schema import Schema
+from jsonschema import RefResolver, SchemaError, ValidationError
 
 
 @pytest.fixture
@@ -254,3 +261,402 @@ def test_schemas_iterates_correct_schema_ids(path, matcher):
         "https://github.com/mr-rodgers/configkit/test/schemas/0.2/config.json",
         "https://github.com/mr-rodgers/configkit/test/schemas/0.1/credentials.json",
     }
+
+
+def rewrite_id(filepath, new_id):
+    with open(filepath, encoding="utf-8") as fp:
+        definition = json.load(fp)
+    definition["$id"] = new_id
+    with open(filepath, "w", encoding="utf-8") as fp:
+        json.dump(definition, fp)
+
+
+def test_index_persists_between_lookups(path, matcher, mocker):
+    directory = SchemaDirectory(path, matcher)
+    directory["config"]
+    mocker.spy(directory, "find")
+    mocker.spy(json, "loads")
+
+    directory["config"]
+    len(directory)
+    list(directory.schemas())
+
+    assert directory.find.call_count == 0
+    assert json.loads.call_count == 0
+
+
+def test_refresh_without_changes_keeps_generation(path, matcher, mocker):
+    directory = SchemaDirectory(path, matcher)
+    generation = directory.refresh()
+    mocker.spy(json, "loads")
+
+    assert directory.refresh() == generation
+    assert json.loads.call_count == 0
+
+
+def test_refresh_rereads_only_changed_files(path, version_name_matcher, mocker):
+    directory = SchemaDirectory(path, version_name_matcher)
+    generation = directory.refresh()
+    untouched = directory["credentials"].newest()
+    changed = str(Path(path, "1.0", "config.json"))
+
+    rewrite_id(changed, "https://example.com/changed/config.json")
+    mocker.spy(json, "loads")
+
+    assert directory.refresh() > generation
+    assert json.loads.call_count == 1
+    assert directory["credentials"].newest() is untouched
+    assert directory["config"].newest().id == "https://example.com/changed/config.json"
+
+
+def test_refresh_picks_up_added_and_removed_files(path, version_name_matcher):
+    directory = SchemaDirectory(path, version_name_matcher)
+    assert len(directory["config"]) == 3
+
+    Path(path, "2.0").mkdir()
+    shutil.copyfile(
+        str(Path(path, "1.0", "config.json")), str(Path(path, "2.0", "config.json"))
+    )
+    Path(path, "0.1", "config.json").unlink()
+    directory.refresh()
+
+    assert sorted(sch.version for sch in directory["config"]) == ["0.2", "1.0", "2.0"]
+
+
+def test_invalidate_forces_reread(path, version_name_matcher, mocker):
+    directory = SchemaDirectory(path, version_name_matcher)
+    old = directory["config"].newest()
+    mocker.spy(json, "loads")
+
+    directory.invalidate(str(Path(path, "1.0", "config.json")))
+    new = directory["config"].newest()
+
+    assert json.loads.call_count == 1
+    assert new is not old
+    assert new.id == old.id
+
+
+def test_invalidate_everything_rescans(path, matcher, mocker):
+    directory = SchemaDirectory(path, matcher)
+    len(directory)
+    mocker.spy(directory, "find")
+
+    directory.invalidate()
+    len(directory)
+
+    assert directory.find.call_count == 1
+
+
+def test_manifest_round_trip(path, matcher, tmp_path):
+    manifest = str(tmp_path / "index.json")
+    SchemaDirectory(path, matcher, manifest=manifest).save_manifest()
+
+    directory = SchemaDirectory(path, matcher, manifest=manifest)
+
+    assert set(directory) == {"config", "credentials"}
+    assert {s.id for s in directory.schemas()} == {
+        s.id for s in SchemaDirectory(path, matcher).schemas()
+    }
+
+
+def test_matcher_sees_paths_relative_to_root(tmp_path):
+    root = tmp_path / "9.9" / "schemas"
+    root.mkdir(parents=True)
+    shutil.copyfile(
+        str(PurePath(__file__).with_name("schemas") / "config-1.0.json"),
+        str(root / "config.json"),
+    )
+
+    assert SchemaDirectory(str(root), vnm)["config"][0].version is None
+
+
+def test_excluded_dirs_are_not_listed(path, version_name_matcher):
+    for name in (".git", "node_modules"):
+        (Path(path) / name / "1.0").mkdir(parents=True)
+        shutil.copyfile(
+            str(Path(path, "1.0", "config.json")),
+            str(Path(path, name, "1.0", "other.json")),
+        )
+    directory = SchemaDirectory(path, version_name_matcher)
+
+    assert set(directory) == {"config", "credentials"}
+    assert directory.stats()["dirs_listed"] == 4
+
+
+def test_unreadable_dirs_are_skipped(path, same_level_matcher, mocker):
+    locked = Path(path, "locked")
+    locked.mkdir()
+    shutil.copyfile(str(Path(path, "config-1.0.json")), str(locked / "other-1.0.json"))
+    scandir = os.scandir
+
+    def fake_scandir(dirpath):
+        if dirpath == str(locked):
+            raise PermissionError(13, "Permission denied", dirpath)
+        return scandir(dirpath)
+
+    mocker.patch("os.scandir", fake_scandir)
+    directory = SchemaDirectory(path, same_level_matcher)
+
+    assert set(directory) == {"config", "credentials"}
+    mocker.patch("os.scandir", scandir)
+    assert "other" in SchemaDirectory(path, same_level_matcher)
+
+
+def test_max_depth_and_extensions(path, version_name_matcher, mocker):
+    deep = Path(path, "1.0", "nested")
+    deep.mkdir()
+    shutil.copyfile(str(Path(path, "1.0", "config.json")), str(deep / "deep.json"))
+    Path(path, "1.0", "notes.txt").write_text("not a schema")
+    matcher = RegexMatcher(
+        version_name_matcher.pattern, max_depth=1, extensions=["json"]
+    )
+    mocker.spy(matcher, "check")
+    directory = SchemaDirectory(path, matcher)
+
+    assert "deep" not in directory
+    assert directory.stats()["dirs_listed"] == 4
+    assert matcher.check.call_count == 5
+    assert "max_depth=1" in repr(matcher)
+
+
+def test_scan_reuses_listing_stats(path, matcher, mocker):
+    directory = SchemaDirectory(path, matcher)
+    mocker.spy(os, "stat")
+    len(directory)
+
+    assert os.stat.call_count == 1
+
+
+def test_manifest_skips_walk_and_parse(path, matcher, tmp_path, mocker):
+    manifest = str(tmp_path / "index.json")
+    SchemaDirectory(path, matcher).save_manifest(manifest)
+    directory = SchemaDirectory(path, matcher, manifest=manifest)
+    mocker.spy(directory, "find")
+    mocker.spy(directory, "_list")
+    mocker.spy(json, "loads")
+
+    ids = {sch.id for sch in directory.schemas()}
+
+    assert len(ids) == 5
+    assert directory.find.call_count == 0
+    assert directory._list.call_count == 0
+    assert json.loads.call_count == 0
+
+    directory["config"].newest().definition
+    assert json.loads.call_count == 1
+
+
+def test_manifest_stale_entries_are_reread(path, version_name_matcher, tmp_path):
+    manifest = str(tmp_path / "index.json")
+    SchemaDirectory(path, version_name_matcher).save_manifest(manifest)
+    rewrite_id(
+        str(Path(path, "1.0", "config.json")), "https://example.com/changed/config.json"
+    )
+
+    directory = SchemaDirectory(path, version_name_matcher, manifest=manifest)
+
+    assert "https://example.com/changed/config.json" in {
+        sch.id for sch in directory["config"]
+    }
+
+
+def test_manifest_for_other_matcher_is_ignored(path, same_level_matcher, tmp_path):
+    manifest = str(tmp_path / "index.json")
+    SchemaDirectory(path, same_level_matcher).save_manifest(manifest)
+
+    directory = SchemaDirectory(path, vnm, manifest=manifest)
+
+    assert directory._dirs == {}
+
+
+def test_lazy_scan_reads_nothing(path, matcher, mocker):
+    directory = SchemaDirectory(path, matcher, lazy=True)
+    mocker.spy(json, "loads")
+    mocker.spy(Schema, "check")
+
+    assert set(directory) == {"config", "credentials"}
+    assert sorted(sch.version for sch in directory["config"]) == ["0.1", "0.2", "1.0"]
+    assert json.loads.call_count == 0
+    assert Schema.check.call_count == 0
+
+    newest = directory["config"].newest()
+    assert newest.id.endswith("1.0/config.json")
+    assert newest.definition is newest.definition
+    assert json.loads.call_count == 1
+
+
+def test_lazy_invalid_schema_raises_on_use(path, version_name_matcher):
+    with open(str(Path(path, "1.0", "config.json")), "w", encoding="utf-8") as fp:
+        json.dump({"type": 12}, fp)
+
+    directory = SchemaDirectory(path, version_name_matcher, lazy=True)
+    newest = directory["config"].newest()
+
+    with pytest.raises(SchemaError):
+        newest.definition
+
+
+def test_lazy_invalid_schema_fails_only_its_loads(path, version_name_matcher, tmp_path):
+    with open(str(Path(path, "1.0", "config.json")), "w", encoding="utf-8") as fp:
+        json.dump({"type": 12}, fp)
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"resource_name": "x"}))
+
+    directory = SchemaDirectory(path, version_name_matcher, lazy=True)
+    results = directory.load_many(
+        [(str(config_path), "config", None), (str(config_path), "config", "<1")]
+    )
+
+    assert isinstance(results[0].error, SchemaError)
+    assert results[1].error is None
+
+
+def test_lazy_manifest_skips_invalid_schemas(path, version_name_matcher, tmp_path):
+    with open(str(Path(path, "1.0", "config.json")), "w", encoding="utf-8") as fp:
+        json.dump({"type": 12}, fp)
+    os.mkdir(os.path.join(path, "0.3"))
+    Path(path, "0.3", "config.json").write_text('{"type": ')
+    manifest = str(tmp_path / "index.json")
+    SchemaDirectory(path, version_name_matcher, lazy=True).save_manifest(manifest)
+
+    directory = SchemaDirectory(path, version_name_matcher, manifest=manifest)
+
+    assert sorted(sch.version for sch in directory["config"]) == ["0.1", "0.2"]
+
+
+@pytest.mark.parametrize("executor_type", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_scan_with_executor(path, matcher, executor_type):
+    serial = SchemaDirectory(path, matcher)
+
+    with executor_type(2) as executor:
+        parallel = SchemaDirectory(path, matcher, executor=executor)
+        assert {name: [s.id for s in parallel[name]] for name in parallel} == {
+            name: [s.id for s in serial[name]] for name in serial
+        }
+
+
+def test_scan_with_workers(path, matcher, mocker):
+    expected = [s.id for s in SchemaDirectory(path, matcher).schemas()]
+    parallel = SchemaDirectory(path, matcher, workers=4)
+    mocker.spy(pool, "fan_out")
+
+    assert [s.id for s in parallel.schemas()] == expected
+    assert pool.fan_out.call_args[0][2] == 4
+
+
+def schema_url(version, name):
+    return "https://github.com/mr-rodgers/configkit/test/schemas/{}/{}.json".format(
+        version, name
+    )
+
+
+def test_by_id(path, matcher):
+    directory = SchemaDirectory(path, matcher)
+
+    assert directory.by_id(schema_url("0.2", "config")) in directory["config"]
+    assert directory.by_id("https://example.com/nothing.json") is None
+
+
+def test_lazy_by_id_reads_likely_files_first(path, version_name_matcher, mocker):
+    directory = SchemaDirectory(path, version_name_matcher, lazy=True)
+    len(directory)
+    mocker.spy(json, "loads")
+
+    credentials = directory.by_id(schema_url("1.0", "credentials"))
+
+    assert credentials.version == "1.0"
+    assert json.loads.call_count <= 2
+
+
+def test_load_resolves_refs_through_directory(path, matcher, tmp_path):
+    directory = SchemaDirectory(path, matcher)
+    config_path = tmp_path / "config.json"
+    config_path.write_text(
+        json.dumps(
+            {"resources": ["x"], "credentials": {"client_id": "a", "secret_key": "b"}}
+        )
+    )
+
+    assert directory["config"].newest().load(str(config_path))["resources"] == ["x"]
+
+    config_path.write_text(json.dumps({"resources": ["x"], "credentials": {}}))
+    with pytest.raises(ValidationError):
+        directory["config"].newest().load(str(config_path))
+
+
+def test_validator_rebuilt_only_when_dependency_changes(path, version_name_matcher):
+    directory = SchemaDirectory(path, version_name_matcher)
+    config = directory["config"].newest()
+    validator = config.validator
+
+    rewrite_id(str(Path(path, "0.1", "credentials.json")), "https://example.com/a.json")
+    directory.refresh()
+    assert config.validator is validator
+
+    directory.invalidate(str(Path(path, "1.0", "credentials.json")))
+    directory.refresh()
+    assert config.validator is not validator
+
+
+def test_remote_refs_cached_across_resolvers(path, matcher, mocker):
+    directory = SchemaDirectory(path, matcher)
+    fetch = mocker.patch.object(
+        RefResolver, "resolve_remote", return_value={"type": "string"}
+    )
+
+    for _ in range(2):
+        resolver = directory.resolver(None, {})
+        assert resolver.resolve("https://example.com/remote.json")[1] == {
+            "type": "string"
+        }
+
+    assert fetch.call_count == 1
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_concurrent_ascans_are_coalesced(path, matcher, mocker):
+    directory = SchemaDirectory(path, matcher)
+    mocker.spy(directory, "refresh")
+
+    async def lookup():
+        return await directory.aget("config")
+
+    async def main():
+        return await asyncio.gather(*(lookup() for _ in range(100)))
+
+    results = run(main())
+
+    assert directory.refresh.call_count == 1
+    assert all(result is results[0] for result in results)
+    assert len(results[0]) == 3
+
+
+def test_aload(path, matcher, tmp_path):
+    directory = SchemaDirectory(path, matcher)
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"resources": ["x"]}))
+    bad_path = tmp_path / "bad.json"
+    bad_path.write_text(json.dumps({}))
+
+    async def main():
+        config = (await directory.aget("config")).newest()
+        instance = await config.aload(str(config_path))
+        frozen = await config.aload(str(config_path), frozen=True)
+        results = await config.aload_many([str(config_path), str(bad_path)])
+        with pytest.raises(ValidationError):
+            await config.aload(str(bad_path), fail_fast=True)
+        return instance, frozen, results
+
+    instance, frozen, results = run(main())
+
+    assert instance == {"resources": ["x"]}
+    assert isinstance(frozen, FrozenDict) and frozen == instance
+    assert results[0].error is None
+    assert isinstance(results[1].error, ValidationError)
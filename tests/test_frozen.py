@@ -0,0 +1,96 @@
+import copy
+import json
+import pickle
+import pytest
+from configkit import ValidationError
+from configkit.frozen import FrozenDict, FrozenList, freeze, resolve
+from configkit.loaders import default_registry
+from configkit.validation import CompiledBackend
+
+CONFIG = {
+    "resources": ["x", {"name": "y", "type": "static"}],
+    "credentials": {"client_id": "a", "secret_key": "b"},
+}
+
+
+@pytest.fixture
+def schema_directory(schema_directory):
+    schema_directory.frozen = True
+    return schema_directory
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(CONFIG))
+    return str(path)
+
+
+def assert_frozen(instance):
+    if isinstance(instance, dict):
+        assert type(instance) is FrozenDict
+        for value in instance.values():
+            assert_frozen(value)
+    elif isinstance(instance, list):
+        assert type(instance) is FrozenList
+        for value in instance:
+            assert_frozen(value)
+
+
+@pytest.mark.parametrize("format", ["json", "jsonc", "yaml"])
+def test_frozen_while_parsing(format):
+    data = json.dumps([CONFIG, [[1], []]])
+    instance = default_registry.loads(data, format, frozen=True)
+
+    assert_frozen(instance)
+    assert instance == [CONFIG, [[1], []]]
+
+
+def test_frozen_instances_are_read_only():
+    instance = freeze(CONFIG)
+
+    with pytest.raises(TypeError):
+        instance["resources"] = []
+    with pytest.raises(TypeError):
+        instance.credentials.update(client_id="c")
+    with pytest.raises(TypeError):
+        instance.resources.append("z")
+    assert instance == CONFIG
+
+
+def test_frozen_instances_are_shared_not_copied():
+    instance = freeze(CONFIG)
+
+    assert hash(instance) == hash(freeze(json.loads(json.dumps(CONFIG))))
+    assert {instance: 1}[freeze(CONFIG)] == 1
+    assert copy.deepcopy(instance) is instance
+    assert freeze(instance) is instance
+    assert pickle.loads(pickle.dumps(instance)) == instance
+    assert_frozen(pickle.loads(pickle.dumps(instance)))
+
+
+def test_attribute_and_pointer_access():
+    instance = freeze(CONFIG)
+
+    assert instance.credentials.client_id == "a"
+    assert instance.pointer("/resources/1/name") == "y"
+    assert instance.resources.pointer("/0") == "x"
+    assert resolve(instance, "") is instance
+    with pytest.raises(AttributeError):
+        instance.missing
+    with pytest.raises(ValueError):
+        instance.pointer("resources")
+
+
+@pytest.mark.parametrize("backend", [None, CompiledBackend()])
+def test_load_frozen(schema_directory, config_path, backend):
+    config = schema_directory["config"].version("==1.0")
+    config.backend = backend
+
+    instance = config.load(config_path)
+    assert_frozen(instance)
+    assert instance == CONFIG
+    assert type(config.load(config_path, frozen=False)) is dict
+
+    with pytest.raises(ValidationError):
+        config.loads(json.dumps({"resources": "x"}))
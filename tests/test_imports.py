@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+import configkit
+import jsonschema
+import pytest
+
+# Cumulative time to import configkit, as reported by ``-X importtime``.
+# It is about a third of this on a typical machine; the rest is headroom.
+IMPORT_BUDGET = 0.25
+
+OPTIONAL = [
+    "jsonschema",
+    "packaging",
+    "yaml",
+    "toml",
+    "tomllib",
+    "tomli",
+    "orjson",
+    "inotify_simple",
+]
+
+
+def python(*args: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(configkit.__file__))
+    env["PYTHONPATH"] = os.pathsep.join([root, env.get("PYTHONPATH", "")])
+    return subprocess.run(
+        [sys.executable] + list(args),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+def test_import_defers_dependencies():
+    script = "import configkit, json, sys; print(json.dumps(sorted(sys.modules)))"
+    loaded = set(json.loads(python("-c", script).stdout))
+
+    assert loaded.isdisjoint(OPTIONAL)
+    assert "asyncio" not in loaded
+    assert "configkit.watch" not in loaded
+    assert "concurrent.futures.process" not in loaded
+
+
+def test_validation_error_is_imported_when_used():
+    assert configkit.ValidationError is jsonschema.ValidationError
+    with pytest.raises(AttributeError):
+        configkit.NoSuchThing
+
+
+def test_import_time_budget():
+    timings = []
+    for _ in range(3):
+        report = python("-X", "importtime", "-c", "import configkit").stderr
+        timings.append(cumulative_time(report, "configkit"))
+
+    assert min(timings) < IMPORT_BUDGET, timings
+
+
+def cumulative_time(report: str, module: str) -> float:
+    for line in report.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1e6
+    raise AssertionError("{} was not imported".format(module))
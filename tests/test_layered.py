@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import pytest
+from pathlib import Path, PurePath
+from configkit import SchemaDirectory
+from configkit.layered import LayeredDirectory
+from jsonschema import ValidationError
+
+CREDENTIALS_ID = (
+    "https://github.com/mr-rodgers/configkit/test/schemas/1.0/credentials.json"
+)
+
+
+@pytest.fixture
+def base(tmp_path):
+    path = str(tmp_path / "base")
+    shutil.copytree(str(PurePath(__file__).with_name("schemas")), path)
+    return path
+
+
+@pytest.fixture
+def site(tmp_path):
+    path = tmp_path / "site"
+    path.mkdir()
+    write(path / "credentials-1.0.json", {"$id": CREDENTIALS_ID, "required": ["token"]})
+    write(path / "config-2.0.json", {"type": "object"})
+    return str(path)
+
+
+def write(path: Path, definition):
+    path.write_text(json.dumps(definition))
+
+
+def test_precedence(site, base, matcher):
+    layered = LayeredDirectory([site, base], matcher)
+
+    assert set(layered) == {"config", "credentials"}
+    assert [sch.version for sch in layered["config"]] == ["2.0", "0.1", "0.2", "1.0"]
+    assert layered["config"].newest().path.startswith(site)
+    credentials = layered["credentials"]
+    assert [sch.version for sch in credentials] == ["1.0", "0.1"]
+    assert credentials.version("==1.0").path.startswith(site)
+    assert layered.by_id(CREDENTIALS_ID) is credentials.version("==1.0")
+
+
+def test_refs_resolve_across_layers(site, base, matcher):
+    layered = LayeredDirectory([site, base], matcher)
+    config = layered["config"].version("==1.0")
+
+    assert config.path.startswith(base)
+    assert config.validate({"resources": ["x"], "credentials": {"token": "t"}})
+    with pytest.raises(ValidationError):
+        config.validate({"resources": ["x"], "credentials": {"client_id": "a"}})
+
+
+def test_changed_layer_is_merged_incrementally(site, base, matcher):
+    site_layer = SchemaDirectory(site, matcher)
+    base_layer = SchemaDirectory(base, matcher)
+    layered = LayeredDirectory([site_layer, base_layer])
+    credentials = layered["credentials"]
+    generation = layered.generation
+
+    write(Path(site) / "extra-1.0.json", {})
+    layered.invalidate(site)
+    assert "extra" in layered
+    assert layered["credentials"] is credentials
+    assert layered.generation == generation + 1
+    assert base_layer.stats()["scans"] == 1
+
+    os.remove(os.path.join(site, "credentials-1.0.json"))
+    layered.refresh()
+    assert layered["credentials"].version("==1.0").path.startswith(base)
+    assert layered.by_id(CREDENTIALS_ID).path.startswith(base)
+
+
+def test_lookups_do_not_touch_layers(site, base, matcher, mocker):
+    layered = LayeredDirectory([site, base], matcher)
+    len(layered)
+    for layer in layered.layers:
+        mocker.spy(layer, "scan_if_needed")
+
+    layered["config"]
+    layered.by_id(CREDENTIALS_ID)
+    assert all(layer.scan_if_needed.call_count == 0 for layer in layered.layers)
+
+
+def test_lazy_layers_are_searched_by_id(site, base, matcher):
+    layered = LayeredDirectory([site, base], matcher, lazy=True)
+    assert layered.by_id(CREDENTIALS_ID).path.startswith(site)
+    assert layered.by_id("https://example.com/missing.json") is None
+
+
+def test_a_directory_is_a_layer_once(base, matcher):
+    layer = SchemaDirectory(base, matcher)
+    LayeredDirectory([layer])
+    with pytest.raises(ValueError):
+        LayeredDirectory([layer])
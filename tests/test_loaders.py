@@ -0,0 +1,134 @@
+from configkit import loaders
+from configkit.loaders import Format, LoaderRegistry, default_registry
+import json
+import os
+import pytest
+import threading
+
+
+@pytest.fixture
+def credentials():
+    return {"client_id": "$foo$", "secret_key": "!bar!"}
+
+
+def test_jsonc(tmp_path, credentials):
+    path = tmp_path / "credentials.jsonc"
+    path.write_text(
+        '{\n  // who we are\n  "client_id": "$foo$", /* and the\n secret */\n'
+        '  "secret_key": "!bar!"\n}'
+    )
+
+    assert default_registry.read(str(path)) == credentials
+    assert default_registry.loads('{"url": "http://x//y"} // c', "jsonc") == {
+        "url": "http://x//y"
+    }
+
+
+def test_ndjson_loads_as_list(tmp_path, credentials):
+    path = tmp_path / "credentials.ndjson"
+    path.write_text(json.dumps(credentials) + "\n" + json.dumps(credentials) + "\n")
+
+    assert default_registry.read(str(path)) == [credentials, credentials]
+
+
+def test_yml_is_yaml():
+    pytest.importorskip("yaml")
+
+    assert default_registry["yml"] is default_registry["yaml"]
+    assert default_registry.loads(b"a: 1", "yml") == {"a": 1}
+
+
+def test_yaml_uses_libyaml_when_available():
+    yaml = pytest.importorskip("yaml")
+
+    expected = yaml.CSafeLoader if yaml.__with_libyaml__ else yaml.SafeLoader
+    assert loaders.SafeLoader is expected
+
+
+def test_toml(tmp_path):
+    if loaders.toml is None:
+        pytest.skip("no toml backend is installed")
+    path = tmp_path / "config.toml"
+    path.write_text('resources = ["sugar"]\n')
+
+    assert default_registry.read(str(path)) == {"resources": ["sugar"]}
+
+
+def test_unknown_extension():
+    with pytest.raises(ValueError):
+        default_registry.read("config.xyz")
+
+
+def test_empty_json_file(tmp_path):
+    path = tmp_path / "empty.json"
+    path.write_text("")
+
+    with pytest.raises(ValueError):
+        default_registry.read(str(path))
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs FIFOs")
+def test_json_from_a_fifo(tmp_path, credentials):
+    path = str(tmp_path / "credentials.json")
+    os.mkfifo(path)
+
+    def write():
+        with open(path, "w") as fp:
+            json.dump(credentials, fp)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        assert default_registry.read(path) == credentials
+    finally:
+        writer.join()
+
+
+@pytest.mark.parametrize("frozen", [False, True])
+def test_json_parses_the_same_frozen_or_not(frozen):
+    data = b'{"ratio": NaN, "limits": [Infinity]}'
+
+    config = default_registry.loads(data, "json", frozen=frozen)
+    assert config["limits"] == [float("inf")]
+
+
+@pytest.mark.parametrize("frozen", [False, True])
+def test_orjson_format(tmp_path, credentials, frozen):
+    pytest.importorskip("orjson")
+    registry = default_registry.copy()
+    registry.register("json", format=loaders.orjson_format)
+    path = tmp_path / "credentials.json"
+    path.write_text(json.dumps(credentials))
+
+    assert registry.read(str(path), frozen=frozen) == credentials
+    with pytest.raises(ValueError):
+        registry.loads(b'{"ratio": NaN}', "json", frozen=frozen)
+
+
+def test_format_needs_a_loader():
+    with pytest.raises(ValueError):
+        Format()
+
+
+def test_registered_format_is_shared_by_schemas(schema_directory, credentials, tmp_path):
+    registry = default_registry.copy()
+    registry.register("creds", ".kv", loads=lambda data, encoding="utf-8": dict(
+        line.split("=", 1) for line in loaders.decode(data, encoding).splitlines()))
+    schema_directory.loaders = registry
+    path = tmp_path / "credentials.creds"
+    path.write_text("client_id=$foo$\nsecret_key=!bar!\n")
+
+    for sch in schema_directory["credentials"]:
+        assert sch.formats is registry
+    assert schema_directory["credentials"].newest().load(str(path)) == credentials
+    assert "creds" not in default_registry
+
+
+def test_copy_is_independent():
+    registry = LoaderRegistry()
+    registry.register("a", load=json.load)
+    copy = registry.copy()
+    copy.register("b", load=json.load)
+
+    assert set(registry) == {"a"}
+    assert set(copy) == {"a", "b"}
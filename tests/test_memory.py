@@ -0,0 +1,64 @@
+import json
+import shutil
+import pytest
+from pathlib import Path
+from configkit import SchemaDirectory
+
+
+@pytest.fixture
+def path(path):
+    # Byte-identical to config-1.0.json, as unchanged schemas often are.
+    shutil.copy(str(Path(path, "config-1.0.json")), str(Path(path, "config-1.1.json")))
+    return path
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_identical_schemas_share_definitions(path, matcher, lazy):
+    directory = SchemaDirectory(path, matcher, lazy=lazy)
+    config = directory["config"]
+    old, new = config.version("==1.0"), config.version("==1.1")
+
+    assert old.definition is new.definition
+    assert directory.stats()["definitions_shared"] == 1
+
+
+def test_identical_schemas_share_validators(path, matcher):
+    directory = SchemaDirectory(path, matcher)
+    config = directory["config"]
+    old, new = config.version("==1.0"), config.version("==1.1")
+
+    assert old.validator is new.validator
+    stats = directory.stats()
+    assert stats["validators_built"] == 1
+    assert stats["validators_shared"] == 1
+
+    Path(new.path).write_text(json.dumps({"type": "object"}))
+    directory.refresh()
+    new = directory["config"].version("==1.1")
+    assert new.validator is not old.validator
+    assert old.validator is directory["config"].version("==1.0").validator
+
+
+def test_names_and_versions_are_interned(path, matcher):
+    directory = SchemaDirectory(path, matcher)
+    config = directory["config"].version("==1.0")
+    credentials = directory["credentials"].version("==1.0")
+
+    assert config.version is credentials.version
+    assert config.name is directory["config"].version("==0.1").name
+
+
+def test_memory_report(path, matcher):
+    directory = SchemaDirectory(path, matcher)
+    for sch in directory.schemas():
+        sch.validator
+
+    report = directory.memory_report()
+    assert report["schemas"] == 6
+    assert report["definitions"] == 6
+    assert report["unique_definitions"] == 5
+    assert report["validators"] == 6
+    assert report["unique_validators"] == 5
+    assert 0 < report["index_bytes"]
+    assert 0 < report["schema_bytes"]
+    assert 0 < report["definition_bytes"]
@@ -0,0 +1,85 @@
+from configkit import SchemaDirectory
+from configkit.cache import LoadCache
+from configkit.observers import Counters, IObserver, STAGES, set_observer
+
+
+class Recorder(IObserver):
+    def __init__(self):
+        self.events = []
+
+    def event(self, stage, duration, **info):
+        self.events.append((stage, duration, info))
+
+    @property
+    def stages(self):
+        return {stage for stage, _, _ in self.events}
+
+
+def test_observer_sees_every_stage(path, matcher, config_path):
+    recorder = Recorder()
+    directory = SchemaDirectory(path, matcher, observer=recorder)
+
+    directory["config"].newest().load(config_path)
+
+    assert recorder.stages == set(STAGES)
+    assert all(duration >= 0 for _, duration, _ in recorder.events)
+    assert ("read", {"path": config_path}) in [
+        (stage, info) for stage, _, info in recorder.events
+    ]
+
+
+def test_lazy_schemas_report_reads_when_used(path, matcher):
+    recorder = Recorder()
+    directory = SchemaDirectory(path, matcher, lazy=True, observer=recorder)
+    len(directory)
+    assert recorder.stages == {"walk", "match"}
+
+    directory["credentials"].newest().definition
+    assert {"read", "parse"} <= recorder.stages
+    assert directory.stats()["files_parsed"] == 1
+
+
+def test_global_observer(path, matcher):
+    recorder = Recorder()
+    old = set_observer(recorder)
+    try:
+        len(SchemaDirectory(path, matcher))
+    finally:
+        set_observer(old)
+
+    assert "walk" in recorder.stages
+    recorder.events.clear()
+    len(SchemaDirectory(path, matcher))
+    assert recorder.events == []
+
+
+def test_stats(path, matcher, config_path):
+    directory = SchemaDirectory(path, matcher, load_cache=LoadCache())
+    assert directory.stats()["scans"] == 0
+
+    config = directory["config"].newest()
+    for _ in range(3):
+        config.load(config_path)
+    directory.refresh()
+
+    stats = directory.stats()
+    assert stats["full_scans"] == 1
+    assert stats["scans"] == 2
+    assert stats["files_parsed"] == 5
+    assert stats["validators_built"] == 1
+    assert stats["configs_read"] == 1
+    assert stats["validations"] == 1
+    assert stats["load_cache_hits"] == 2
+    assert stats["load_cache_misses"] == 1
+    assert stats["refs_resolved"] >= 1
+    assert stats["generation"] == directory.generation
+
+
+def test_counters():
+    counters = Counters()
+    counters.incr("a")
+    counters.incr("a", 2)
+
+    assert counters.snapshot() == {"a": 3}
+    counters.reset()
+    assert counters.snapshot() == {}
@@ -1,8 +1,13 @@
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from collections import namedtuple
 from configkit import ValidationError
-from configkit.schema import Schema
+from configkit import loaders
+from configkit.cache import LoadCache
+from configkit.schema import Schema, find_refs
+from packaging.specifiers import InvalidSpecifier
 import json
+import mmap
 import pytest
 
 SchemaInfo = namedtuple("SchemaInfo", ["name", "version"])
@@ -21,24 +26,6 @@ config_definition = generate_schema_fixture("config-1.0.json")
 credentials_definition = generate_schema_fixture("credentials-1.0.json")
 
 
-@pytest.fixture
-def definitions(config_definition, credentials_definition):
-    return {defi["$id"]: defi for defi in [config_definition, credentials_definition]}
-
-
-@pytest.fixture
-def mock_schemas(definitions, mocker):
-    return [mocker.Mock(definition=defin, id=def_id) for (def_id, defin) in definitions.items()]
-
-
-@pytest.fixture
-def mock_directory(mock_schemas, mocker):
-    directory = mocker.Mock(**{
-        'schemas.return_value': mock_schemas
-    })
-    return directory
-
-
 @pytest.fixture
 def valid_config():
     return {
@@ -151,24 +138,26 @@ def empty_invalid_suffix_path(request):
     return request.getfixturevalue("empty_{}_path".format(request.param))
 
 
-def test_raise_import_error_without_known_extras(config_definition, mock_directory, empty_path):
-    schema = Schema(config_definition, None, mock_directory)
+def test_raise_import_error_without_known_extras(config_definition, schema_directory, empty_path,
+                                                 mocker):
+    mocker.patch.object(loaders, "backend", return_value=None)
+    schema = Schema(config_definition, None, schema_directory)
 
     with pytest.raises(ImportError, match=r"pip install configkit\[[^\]]+\]"):
         schema.load(str(empty_path))
 
 
-def test_raise_value_error_with_unknown_suffix(config_definition, mock_directory, empty_invalid_suffix_path):
-    schema = Schema(config_definition, None, mock_directory)
+def test_raise_value_error_with_unknown_suffix(config_definition, schema_directory, empty_invalid_suffix_path):
+    schema = Schema(config_definition, None, schema_directory)
 
     with pytest.raises(ValueError):
         schema.load(str(empty_invalid_suffix_path))
 
 
 def test_custom_loader_with_unknown_suffix(
-        config_definition, mock_directory, empty_invalid_suffix_path,
+        config_definition, schema_directory, empty_invalid_suffix_path,
         valid_config, mocker):
-    schema = Schema(config_definition, None, mock_directory)
+    schema = Schema(config_definition, None, schema_directory)
 
     loader = mocker.stub()
     loader.return_value = valid_config
@@ -183,8 +172,8 @@ def test_custom_loader_with_unknown_suffix(
     ('valid_config_with_credentials', 'valid_config_with_credentials', 'config'),
     ('valid_credentials', 'valid_credentials', 'credentials')
 ], indirect=True)
-def test_load_valid_config(path, definition, mock_directory, data):
-    schema = Schema(definition, None, mock_directory)
+def test_load_valid_config(path, definition, schema_directory, data):
+    schema = Schema(definition, None, schema_directory)
     assert schema.load(str(path)) == data
 
 
@@ -192,7 +181,267 @@ def test_load_valid_config(path, definition, mock_directory, data):
     ('invalid_config', 'invalid_config', 'config'),
     ('invalid_credentials', 'invalid_credentials', 'credentials')
 ], indirect=True)
-def test_load_invalid_config(path, definition, mock_directory, data):
-    schema = Schema(definition, None, mock_directory)
+def test_load_invalid_config(path, definition, schema_directory, data):
+    schema = Schema(definition, None, schema_directory)
+    with pytest.raises(ValidationError):
+        schema.load(str(path))
+
+
+def test_validator_is_reused(config_definition, schema_directory):
+    schema = Schema(config_definition, None, schema_directory)
+
+    assert schema.validator is schema.validator
+
+
+def test_validator_kept_when_dependencies_unchanged(config_definition, schema_directory):
+    schema = Schema(config_definition, None, schema_directory)
+    validator = schema.validator
+
+    schema_directory.generation += 1
+
+    assert schema.validator is validator
+
+
+def test_refs_are_absolute(config_definition):
+    assert find_refs(config_definition, config_definition["$id"]) == {
+        "https://github.com/mr-rodgers/configkit/test/schemas/1.0/credentials.json"
+    }
+    assert find_refs({"$ref": "#/definitions/a", "definitions": {"a": {}}}) == set()
+
+
+def test_dependencies(config_definition, schema_directory):
+    schema = Schema(config_definition, None, schema_directory)
+    credentials = schema_directory["credentials"].newest()
+
+    assert schema.dependencies() == {credentials.id: credentials}
+
+
+def test_validate_instance(config_definition, schema_directory, valid_config_with_credentials, invalid_config):
+    schema = Schema(config_definition, None, schema_directory)
+
+    assert schema.validate(valid_config_with_credentials) is valid_config_with_credentials
     with pytest.raises(ValidationError):
+        schema.validate(invalid_config)
+
+
+def test_is_valid(config_definition, schema_directory, valid_config_path,
+                  invalid_config_path, valid_config, invalid_config):
+    schema = Schema(config_definition, None, schema_directory)
+
+    assert schema.is_valid(valid_config)
+    assert not schema.is_valid(invalid_config)
+    assert schema.is_valid(str(valid_config_path))
+    assert not schema.is_valid(invalid_config_path)
+
+
+def test_fail_fast(config_definition, schema_directory, invalid_config_path, mocker):
+    schema = Schema(config_definition, None, schema_directory)
+    mocker.spy(schema.validator, "validate")
+
+    with pytest.raises(ValidationError) as error:
+        schema.load(str(invalid_config_path), fail_fast=True)
+
+    assert error.value.message.startswith("Instance is not valid")
+    assert schema.validator.validate.call_count == 0
+
+    schema_directory.fail_fast = True
+    with pytest.raises(ValidationError):
+        schema.validate({"keep_alive": "no"})
+    assert schema.validator.validate.call_count == 0
+
+
+def test_iter_errors_limit(config_definition, schema_directory):
+    schema = Schema(config_definition, None, schema_directory)
+    instance = {"keep_alive": 1, "resources": [1] * 100, "extra": True}
+
+    assert len(list(schema.iter_errors(instance))) == 102
+    errors = list(schema.iter_errors(instance, limit=5))
+    assert len(errors) == 5
+    assert all(isinstance(error, ValidationError) for error in errors)
+
+
+def test_load_many_collects_errors(config_definition, schema_directory, valid_config_path,
+                                   invalid_config_path, valid_config_with_credentials_path,
+                                   valid_config, tmp_path):
+    schema = Schema(config_definition, None, schema_directory)
+    paths = [str(valid_config_path), str(invalid_config_path),
+             str(tmp_path / "missing.json"), str(valid_config_with_credentials_path)]
+
+    results = schema.load_many(paths, workers=3)
+
+    assert [result.path for result in results] == paths
+    assert results[0].instance == valid_config and results[0].error is None
+    assert isinstance(results[1].error, ValidationError)
+    assert isinstance(results[2].error, OSError)
+    assert results[3].error is None
+
+
+def test_load_many_in_process_pool(config_definition, schema_directory, valid_config_path,
+                                   invalid_config_path, valid_config):
+    schema = Schema(config_definition, None, schema_directory)
+
+    with ProcessPoolExecutor(2) as executor:
+        results = schema.load_many(
+            [str(valid_config_path), str(invalid_config_path)], executor=executor)
+
+    assert results[0].instance == valid_config
+    assert isinstance(results[1].error, ValidationError)
+
+
+def test_load_many_shares_validator_across_threads(config_definition, schema_directory,
+                                                   valid_config_with_credentials_path,
+                                                   invalid_credentials, tmp_path):
+    schema = Schema(config_definition, None, schema_directory)
+    bad = tmp_path / "bad.json"
+    bad.write_text(json.dumps({"resources": ["x"], "credentials": invalid_credentials}))
+    paths = [str(valid_config_with_credentials_path), str(bad)] * 50
+
+    results = schema.load_many(paths, workers=8)
+
+    assert [result.error is None for result in results] == [True, False] * 50
+
+
+def test_directory_load_many(schema_directory, valid_config_path, valid_credentials_path,
+                             invalid_config_path):
+    results = schema_directory.load_many([
+        (str(valid_config_path), "config", None),
+        (str(valid_credentials_path), "credentials", "~=1.0"),
+        (str(invalid_config_path), "config", "<1"),
+        (str(valid_config_path), "config", ">2"),
+        (str(valid_config_path), "nope", None),
+        (str(valid_config_path), "config", "not a spec"),
+    ], workers=2)
+
+    assert [result.error is None for result in results] == [True, True, False, False, False, False]
+    assert isinstance(results[2].error, ValidationError)
+    assert all(isinstance(result.error, LookupError) for result in results[3:5])
+    assert isinstance(results[5].error, InvalidSpecifier)
+
+
+def test_iter_load_ndjson(credentials_definition, schema_directory, valid_credentials,
+                          invalid_credentials, tmp_path):
+    schema = Schema(credentials_definition, None, schema_directory)
+    path = tmp_path / "records.ndjson"
+    path.write_text("\n".join(json.dumps(record) for record in [
+        valid_credentials, valid_credentials, invalid_credentials, valid_credentials
+    ]) + "\n\n")
+
+    records = schema.iter_load(str(path))
+    assert next(records) == valid_credentials
+    assert next(records) == valid_credentials
+
+    with pytest.raises(ValidationError) as excinfo:
+        next(records)
+    assert list(excinfo.value.path)[0] == 2
+
+
+def test_iter_load_ndjson_parse_error(credentials_definition, schema_directory,
+                                      valid_credentials, tmp_path):
+    schema = Schema(credentials_definition, None, schema_directory)
+    path = tmp_path / "records.ndjson"
+    path.write_text(json.dumps(valid_credentials) + "\n\n" + '{"client_id": }\n')
+
+    records = schema.iter_load(str(path))
+    assert next(records) == valid_credentials
+
+    with pytest.raises(ValueError, match="^line 3: "):
+        next(records)
+
+
+def test_iter_load_yaml_documents(credentials_definition, schema_directory,
+                                  valid_credentials, tmp_path):
+    yaml = pytest.importorskip("yaml")
+    schema = Schema(credentials_definition, None, schema_directory)
+    path = tmp_path / "records.yaml"
+    path.write_text(yaml.safe_dump_all([valid_credentials] * 3))
+
+    assert list(schema.iter_load(str(path))) == [valid_credentials] * 3
+
+
+def test_iter_load_unknown_format(credentials_definition, schema_directory, tmp_path):
+    schema = Schema(credentials_definition, None, schema_directory)
+
+    with pytest.raises(ValueError):
+        next(schema.iter_load(str(tmp_path / "records.json")))
+
+
+def test_cached_load_skips_parse_and_validation(config_definition, schema_directory,
+                                                valid_config_path, mocker):
+    schema = Schema(config_definition, None, schema_directory)
+    cache = LoadCache()
+    first = schema.load(str(valid_config_path), cache=cache)
+    mocker.spy(json, "loads")
+    mocker.spy(schema.validator, "validate")
+
+    assert schema.load(str(valid_config_path), cache=cache) is first
+    assert json.loads.call_count == 0
+    assert schema.validator.validate.call_count == 0
+
+
+def test_cached_loads_are_frozen(config_definition, schema_directory, valid_config_path,
+                                 valid_config):
+    schema = Schema(config_definition, None, schema_directory)
+    cache = LoadCache()
+    first = schema.load(str(valid_config_path), cache=cache)
+
+    assert first == valid_config
+    with pytest.raises(TypeError):
+        first["keep_alive"] = True
+    assert schema.load(str(valid_config_path), cache=cache) == valid_config
+
+
+def test_cached_load_rereads_changed_file(config_definition, schema_directory,
+                                          valid_config_path, invalid_config):
+    schema_directory.load_cache = LoadCache()
+    schema = Schema(config_definition, None, schema_directory)
+    schema.load(str(valid_config_path))
+
+    valid_config_path.write_text(json.dumps(invalid_config))
+
+    with pytest.raises(ValidationError):
+        schema.load(str(valid_config_path))
+
+
+@pytest.mark.parametrize("wrap", [
+    lambda text: text,
+    lambda text: text.encode("utf-8"),
+    lambda text: bytearray(text.encode("utf-8")),
+    lambda text: memoryview(text.encode("utf-8")),
+])
+def test_loads_buffers(config_definition, schema_directory, valid_config, wrap):
+    schema = Schema(config_definition, None, schema_directory)
+
+    assert schema.loads(wrap(json.dumps(valid_config))) == valid_config
+
+
+def test_loads_mmap(config_definition, schema_directory, valid_config_path, valid_config):
+    schema = Schema(config_definition, None, schema_directory)
+
+    with valid_config_path.open("rb") as fp:
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            assert schema.loads(data) == valid_config
+
+
+def test_loads_yaml_bytes(config_definition, schema_directory, valid_config):
+    yaml = pytest.importorskip("yaml")
+    schema = Schema(config_definition, None, schema_directory)
+
+    assert schema.loads(yaml.safe_dump(valid_config).encode(), format="yaml") == valid_config
+
+
+def test_loads_invalid(config_definition, schema_directory, invalid_config):
+    schema = Schema(config_definition, None, schema_directory)
+
+    with pytest.raises(ValidationError):
+        schema.loads(json.dumps(invalid_config).encode())
+    with pytest.raises(ValueError):
+        schema.loads(b"", format="xyz")
+
+
+def test_load_empty_json_file(config_definition, schema_directory, tmp_path):
+    schema = Schema(config_definition, None, schema_directory)
+    path = tmp_path / "empty.json"
+    path.write_text("")
+
+    with pytest.raises(ValueError):
         schema.load(str(path))
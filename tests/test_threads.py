@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+import time
+import pytest
+from pathlib import Path
+from configkit import SchemaDirectory
+
+CREDENTIALS_ID = "https://github.com/mr-rodgers/configkit/test/schemas/1.0/credentials.json"
+
+THREADS = 8
+
+
+def run_threads(targets):
+    # Start every target at once, each on its own thread; return what they raised.
+    errors = []
+    start = threading.Barrier(len(targets))
+
+    def run(target):
+        try:
+            start.wait()
+            target()
+        except BaseException as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run, args=(target,)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_first_use_scans_once(path, matcher, lazy):
+    directory = SchemaDirectory(path, matcher, lazy=lazy)
+
+    def use():
+        assert directory.by_id(CREDENTIALS_ID) is not None
+        assert len(directory["config"].versions) == 3
+
+    errors = run_threads([use] * THREADS)
+
+    assert errors == []
+    stats = directory.stats()
+    assert stats["full_scans"] == 1
+    assert stats["scans"] == 1
+
+
+def test_lazy_ids_are_resolved_into_a_new_snapshot(path, matcher):
+    directory = SchemaDirectory(path, matcher, lazy=True)
+    before = directory._current()
+    ids, unresolved = dict(before.ids), before.unresolved
+
+    assert directory.by_id(CREDENTIALS_ID).version == "1.0"
+    assert before.ids == ids and before.unresolved == unresolved
+    assert directory._current() is not before
+    assert directory._current().names is before.names
+
+
+def test_concurrent_refreshes_are_coalesced(path, matcher):
+    directory = SchemaDirectory(path, matcher)
+    len(directory)
+    scan, scanning, release = directory._scan, threading.Event(), threading.Event()
+
+    def slow_scan():
+        scanning.set()
+        release.wait()
+        scan()
+
+    directory._scan = slow_scan
+    first = threading.Thread(target=directory.refresh)
+    first.start()
+    scanning.wait()
+    # These all ask while the first scan is running; one more scan will do.
+    others = [threading.Thread(target=directory.refresh) for _ in range(THREADS)]
+    for thread in others:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in [first] + others:
+        thread.join()
+
+    assert directory.stats()["scans"] == 1 + 2
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_lookups_and_loads_while_rescanning(path, matcher, config_path, lazy):
+    directory = SchemaDirectory(path, matcher, lazy=lazy)
+    done = threading.Event()
+    extra = Path(path, "config-2.0.json")
+
+    def read():
+        while not done.is_set():
+            config = directory["config"]
+            assert len(config.versions) in (3, 4)
+            assert config.newest("<2").load(config_path)["resources"] == ["x"]
+            assert directory.by_id(CREDENTIALS_ID).version == "1.0"
+            assert {"config", "credentials"} <= set(directory)
+
+    def write():
+        try:
+            for index in range(50):
+                if index % 2:
+                    extra.unlink()
+                else:
+                    # Replaced in one step, so a scan never sees it half-written.
+                    partial = Path(path, "config-2.0.json.tmp")
+                    partial.write_text(json.dumps({"type": "object"}))
+                    os.replace(str(partial), str(extra))
+                directory.invalidate(str(extra))
+                directory.refresh()
+        finally:
+            done.set()
+
+    errors = run_threads([write] + [read] * THREADS)
+
+    assert errors == []
+    assert directory.stats()["generation"] > 1
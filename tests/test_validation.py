@@ -0,0 +1,184 @@
+from pathlib import Path
+from configkit import SchemaDirectory, ValidationError
+from configkit.matchers import RegexMatcher
+from configkit.validation import (
+    CompiledBackend,
+    CompiledValidator,
+    IValidator,
+    IValidatorBackend,
+    JsonSchemaBackend,
+    compile_validator,
+)
+from jsonschema import Draft7Validator, RefResolutionError, RefResolver
+import pytest
+
+CASES = [
+    (
+        {
+            "type": "object",
+            "properties": {"a": {"type": "integer", "minimum": 3}},
+            "required": ["a"],
+            "additionalProperties": False,
+        },
+        [{"a": 3}, {"a": 3.0}, {"a": 2}, {"a": True}, {}, {"a": 4, "b": 1}, []],
+    ),
+    (
+        {"anyOf": [{"type": "string", "maxLength": 2}, {"multipleOf": 0.5}]},
+        ["ab", "abc", 1.5, 1.25, 2, None],
+    ),
+    (
+        {"oneOf": [{"type": "integer"}, {"type": "number", "minimum": 2}]},
+        [1, 2, 2.5, 1.5, "x"],
+    ),
+    ({"enum": [1, "a", None, [1, 2]]}, [1, 1.0, True, "a", "b", None, [1, 2], [2]]),
+    ({"enum": ["a", "b"]}, ["a", "c", 0, [], {}]),
+    ({"const": {"a": [1, True]}}, [{"a": [1, True]}, {"a": [True, 1]}, {"a": [1, 1]}]),
+    (
+        {"items": [{"type": "integer"}, {"type": "string"}], "additionalItems": False},
+        [[], [1], [1, "a"], [1, 2], [1, "a", None], "not an array"],
+    ),
+    (
+        {"items": [{"type": "integer"}], "additionalItems": {"type": "boolean"}},
+        [[1, True, False], [1, True, 1]],
+    ),
+    ({"additionalItems": False}, [[1, 2]]),
+    (
+        {"contains": {"const": 3}, "uniqueItems": True, "minItems": 1},
+        [[3], [1, 3], [1, 2], [], [3, 3], [1, True], [{"a": 1}, {"a": 1}, 3]],
+    ),
+    (
+        {
+            "patternProperties": {"^a": {"type": "integer"}, "b$": {"minimum": 5}},
+            "additionalProperties": {"type": "string"},
+        },
+        [{"a": 1, "ab": 5, "c": "x"}, {"a": "x"}, {"xb": 4}, {"c": 1}],
+    ),
+    (
+        {"dependencies": {"a": ["b"], "c": {"required": ["d"]}}},
+        [{"a": 1, "b": 1}, {"a": 1}, {"c": 1}, {"c": 1, "d": 1}],
+    ),
+    ({"propertyNames": {"maxLength": 2}, "maxProperties": 2}, [{"ab": 1}, {"abc": 1}]),
+    (
+        {
+            "if": {"properties": {"k": {"const": 1}}},
+            "then": {"required": ["t"]},
+            "else": {"required": ["e"]},
+        },
+        [{"k": 1, "t": 0}, {"k": 1}, {"k": 2, "e": 0}, {"k": 2}],
+    ),
+    ({"not": {"type": "null"}, "minProperties": 1}, [None, {}, {"a": 1}, 3]),
+    (
+        {
+            "$id": "https://example.com/tree.json",
+            "definitions": {
+                "node": {
+                    "type": "object",
+                    "properties": {
+                        "value": {"type": "integer"},
+                        "next": {"$ref": "#/definitions/node"},
+                    },
+                }
+            },
+            "$ref": "#/definitions/node",
+        },
+        [{"value": 1, "next": {"value": 2, "next": {}}}, {"next": {"value": "x"}}],
+    ),
+    (
+        {"type": ["integer", "string"], "exclusiveMaximum": 10, "pattern": "^a"},
+        [1, 10, "abc", "b", 1.5],
+    ),
+    ({"type": "string", "format": "email", "x-unknown": 1}, ["not an email", 1]),
+    (True, [1, None]),
+    (False, [1, None]),
+]
+
+
+@pytest.fixture
+def schema_directory():
+    return SchemaDirectory(
+        str(Path(__file__).with_name("schemas")),
+        RegexMatcher(r"(?P<name>[^/\\]+?)-(?P<version>[^/\\]+?).json$"),
+        backend=CompiledBackend(),
+    )
+
+
+def describe(errors):
+    return [(e.message, list(e.path), list(e.schema_path)) for e in errors]
+
+
+@pytest.mark.parametrize("schema,instances", CASES)
+def test_compiled_matches_jsonschema(schema, instances):
+    interpreted = Draft7Validator(schema)
+    compiled = compile_validator(Draft7Validator(schema))
+
+    for instance in instances:
+        assert compiled.is_valid(instance) == interpreted.is_valid(instance), instance
+        assert describe(compiled.iter_errors(instance)) == describe(
+            interpreted.iter_errors(instance)
+        )
+
+
+def test_compiled_source_is_kept():
+    compiled = compile_validator(Draft7Validator({"type": "string"}))
+    assert "isinstance(x, str)" in compiled.source
+    assert isinstance(compiled, IValidator)
+    assert isinstance(Draft7Validator({}), IValidator)
+
+
+def test_deep_schemas_compile():
+    schema = {"type": "integer"}
+    for _ in range(50):
+        schema = {"items": schema}
+    instance = 1
+    for _ in range(50):
+        instance = [instance]
+
+    assert compile_validator(Draft7Validator(schema)).is_valid(instance)
+
+
+def test_directory_backend_resolves_refs_across_files(schema_directory):
+    config = schema_directory["config"].version("==1.0")
+    credentials = {"client_id": "a", "secret_key": "b"}
+
+    assert isinstance(config.validator, CompiledValidator)
+    assert config.validate({"resources": ["x"], "credentials": credentials})
+
+    with pytest.raises(ValidationError) as compiled:
+        config.validate({"resources": ["x"], "credentials": {"client_id": "a"}})
+    config.backend = JsonSchemaBackend()
+    with pytest.raises(ValidationError) as interpreted:
+        config.validate({"resources": ["x"], "credentials": {"client_id": "a"}})
+
+    assert describe([compiled.value]) == describe([interpreted.value])
+
+
+def test_compiled_is_valid_builds_no_errors(schema_directory, mocker):
+    config = schema_directory["config"].version("==1.0")
+    mocker.spy(config.validator.fallback, "iter_errors")
+
+    assert not config.is_valid({"resources": "x"})
+    with pytest.raises(ValidationError):
+        config.validate({"resources": "x"}, fail_fast=True)
+    assert config.validator.fallback.iter_errors.call_count == 0
+
+
+def test_unresolvable_refs_fail_when_followed(schema_directory, mocker):
+    mocker.patch.object(RefResolver, "resolve_remote", side_effect=ValueError)
+    schema = {"properties": {"a": {"$ref": "https://example.com/a.json"}}}
+    validator = compile_validator(
+        Draft7Validator(schema, resolver=schema_directory.resolver(None, schema))
+    )
+
+    assert validator.is_valid({"b": 1})
+    with pytest.raises(RefResolutionError):
+        validator.is_valid({"a": 1})
+
+
+def test_custom_backend(schema_directory):
+    class Everything(IValidatorBackend):
+        def build(self, sch):
+            return Draft7Validator(True)
+
+    config = schema_directory["config"].version("==1.0")
+    config.backend = Everything()
+    assert config.validate("anything") == "anything"
@@ -1,5 +1,6 @@
 import pytest
 from configkit import version_sort_key
+from configkit import versions
 from configkit.versions import Versions
 from collections import namedtuple
 
@@ -109,3 +110,29 @@ def test_filtered(basic):
     assert [s.version for s in basic.filtered('>=5.3.2')] == [
         '5.3.2', '11.0', None]
     assert [s.version for s in basic.filtered('>11')] == [None]
+
+
+def test_versions_parsed_once(basic, mocker):
+    mocker.spy(versions, "parse")
+    versions.parse_version.cache_clear()
+
+    basic.newest()
+    basic.oldest('>1.0')
+    basic.version('~=1.0', version_sort_key, reverse=True)
+    basic.filtered('>=5.3.2')
+
+    assert versions.parse.call_count == 5
+
+
+def test_specifier_sets_are_shared():
+    assert versions.specifier_set('~=11.1.0') is versions.specifier_set('~=11.1.0')
+
+
+def test_newest_keeps_found_order_among_equal_versions():
+    first, second = MockSchema("1.0"), MockSchema("1.0.0")
+    vers = Versions([MockSchema("0.1"), first, second])
+
+    assert vers.newest() is first
+    assert vers.oldest('>=1') is first
+    assert list(vers.sorted(version_sort_key, reverse=True)) == [
+        first, second, MockSchema("0.1")]
@@ -0,0 +1,112 @@
+from configkit import SchemaDirectory, ValidationError
+from configkit.matchers import version_name_matcher
+from pathlib import Path, PurePath
+import json
+import pytest
+import shutil
+import threading
+
+
+@pytest.fixture
+def path(tmp_path):
+    root = PurePath(__file__).with_name("schemas")
+    tmp_path = tmp_path / "schemas"
+
+    for version in ["0.1", "1.0"]:
+        (tmp_path / version).mkdir(parents=True)
+        for name in ["config", "credentials"]:
+            shutil.copyfile(
+                str(root / "{}-{}.json".format(name, version)),
+                str(tmp_path / version / "{}.json".format(name)),
+            )
+    return str(tmp_path)
+
+
+@pytest.fixture
+def directory(path):
+    return SchemaDirectory(path, version_name_matcher)
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"resources": ["sugar"]}))
+    return config_path
+
+
+def test_register_loads_config(directory, config_path):
+    watcher = directory.watch()
+
+    result = watcher.register(str(config_path), "config")
+
+    assert result.instance == {"resources": ["sugar"]}
+    assert result.error is None
+
+
+def test_poll_without_changes_notifies_nobody(directory, config_path, mocker):
+    watcher = directory.watch()
+    callback = mocker.stub()
+    watcher.register(str(config_path), "config", callback=callback)
+
+    assert watcher.poll() == []
+    assert callback.call_count == 0
+
+
+def test_poll_reloads_changed_config(directory, config_path, mocker):
+    watcher = directory.watch()
+    callback = mocker.stub()
+    watcher.register(str(config_path), "config", callback=callback)
+
+    config_path.write_text(json.dumps({"resources": ["spice", "sugar"]}))
+    watcher.poll()
+
+    assert callback.call_count == 1
+    assert callback.call_args[0][0].instance == {"resources": ["spice", "sugar"]}
+
+    config_path.write_text(json.dumps({}))
+    watcher.poll()
+
+    assert isinstance(callback.call_args[0][0].error, ValidationError)
+
+
+def test_poll_reloads_when_schema_changes(directory, config_path, path, mocker):
+    watcher = directory.watch()
+    callback = mocker.stub()
+    watcher.register(str(config_path), "config", "~=1.0", callback=callback)
+
+    schema_path = Path(path, "1.0", "config.json")
+    definition = json.loads(schema_path.read_text())
+    definition["required"] = ["keep_alive"]
+    schema_path.write_text(json.dumps(definition))
+    watcher.poll()
+
+    assert callback.call_count == 1
+    assert isinstance(callback.call_args[0][0].error, ValidationError)
+
+
+def test_poll_reloads_when_referenced_schema_changes(directory, config_path, path, mocker):
+    config_path.write_text(
+        json.dumps({"resources": ["x"], "credentials": {"client_id": "a", "secret_key": "b"}})
+    )
+    watcher = directory.watch()
+    callback = mocker.stub()
+    watcher.register(str(config_path), "config", "~=1.0", callback=callback)
+
+    schema_path = Path(path, "1.0", "credentials.json")
+    definition = json.loads(schema_path.read_text())
+    definition["oneOf"] = definition["oneOf"][:1]
+    schema_path.write_text(json.dumps(definition))
+    watcher.poll()
+
+    assert callback.call_count == 1
+    assert isinstance(callback.call_args[0][0].error, ValidationError)
+
+
+def test_background_thread_notifies(directory, config_path):
+    reloaded = threading.Event()
+
+    with directory.watch(interval=0.01) as watcher:
+        watcher.register(str(config_path), "config", callback=lambda result: reloaded.set())
+        config_path.write_text(json.dumps({"resources": ["spice"]}))
+
+        assert reloaded.wait(5)